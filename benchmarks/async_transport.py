@@ -0,0 +1,42 @@
+"""
+Sequential versus concurrent auction-house sweep against a local stand-in
+
+server. Usage: `python benchmarks/async_transport.py [pages] [latency]`
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from hypixeltools import auction, network
+from server import StandInServer, makePages
+
+
+def main(totalPages: int = 60, latency: float = 0.05):
+    with StandInServer(makePages(totalPages, pageSize=50), latency) as server:
+        network.root_URL = server.url
+        # a key limited to 120 requests a minute would time the limiter instead
+        network.set_client(network.Client(
+            pool_size=totalPages, limiter=network.RateLimiter(4 * totalPages)
+        ))
+
+        begin = time.perf_counter()
+        for page in range(totalPages):
+            network.skyblock_auctions(key="bench", page=page)
+        sequential = time.perf_counter() - begin
+
+        begin = time.perf_counter()
+        auctions = auction.loadAuctionPages("bench")
+        concurrent = time.perf_counter() - begin
+
+    print("pages: %d, latency: %.0f ms, auctions: %d" % (
+        totalPages, latency * 1000, len(auctions)))
+    print("sequential: %.3f s" % (sequential,))
+    print("concurrent: %.3f s (%.1fx)" % (concurrent, sequential / concurrent))
+
+
+if __name__ == "__main__":
+    main(*(f(_) for f, _ in zip((int, float), sys.argv[1:])))
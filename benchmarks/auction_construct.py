@@ -0,0 +1,55 @@
+"""
+Construction cost of `loadAuctionAPI()` over auction pages, with the lore
+
+cleaned eagerly as originally implemented versus lazily on first access.
+
+Usage: `python benchmarks/auction_construct.py [pages]`
+"""
+
+import gc
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from hypixeltools.auction import loadAuctionAPI
+from auction_memory import DictAuctionOrder
+from server import makePages
+
+
+def timeit(func, rounds: int = 15) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        gc.collect()
+        gc.disable()
+        begin = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - begin)
+        gc.enable()
+    return best
+
+
+def main(totalPages: int = 10):
+    pages = [json.loads(_)['auctions'] for _ in makePages(totalPages, 1000)]
+    count = totalPages * 1000
+    cases = (
+        ("eager (original)", lambda: [
+            {DictAuctionOrder(**_) for _ in page} for page in pages
+        ]),
+        ("lazy", lambda: [loadAuctionAPI(page) for page in pages]),
+        ("lazy, lore read", lambda: [
+            [_.item_lore for _ in loadAuctionAPI(page)] for page in pages
+        ])
+    )
+    print("%d auctions" % (count,))
+    for name, func in cases:
+        cost = timeit(func)
+        print("%-17s %8.1f ms  %6.2f us/auction" % (
+            name, cost * 1000, cost / count * 10 ** 6))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
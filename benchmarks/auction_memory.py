@@ -0,0 +1,59 @@
+"""
+Resident memory of a full auction-house snapshot held as `AuctionOrder`
+
+objects, compared with the original `__dict__`-based class.
+
+Usage: `python benchmarks/auction_memory.py [pages]`
+"""
+
+import gc
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+from re import sub
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from hypixeltools.auction import AuctionOrder
+from server import makePages
+
+
+class DictAuctionOrder():
+    """
+    `AuctionOrder` as originally implemented, storing fields in `__dict__`.
+    """
+
+    def __init__(self, **kwargs):
+        self.bin = False
+        for _ in kwargs:
+            self.__setattr__(_, kwargs[_])
+        if 'item_lore' in kwargs:
+            self.item_lore = sub("§.", "", self.item_lore)
+        self.hash = None
+
+
+def snapshotSize(cls, pages) -> int:
+    gc.collect()
+    tracemalloc.start()
+    snapshot = [cls(**_) for page in pages for _ in json.loads(page)['auctions']]
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(snapshot) > 0
+    return size
+
+
+def main(totalPages: int = 60):
+    pages = makePages(totalPages, 1000)
+    print("%d auctions" % (totalPages * 1000,))
+    baseline = snapshotSize(DictAuctionOrder, pages)
+    for name, cls in (("__dict__", DictAuctionOrder), ("slots", AuctionOrder)):
+        size = baseline if cls is DictAuctionOrder else snapshotSize(cls, pages)
+        print("%-9s %8.1f MB  %6.0f B/auction  %5.1f%%" % (
+            name, size / 2 ** 20, size / totalPages / 1000, size / baseline * 100))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
@@ -0,0 +1,92 @@
+"""
+Query cost of an `AuctionStore` against a full scan with `AuctionFilter`, and
+
+cost of keeping the store, or a lone `PriceLadder`, up to date from a
+
+snapshot where a tenth of the auctions changed.
+
+Usage: `python benchmarks/auction_store.py [pages]`
+"""
+
+import gc
+import json
+import sys
+import time
+from operator import not_
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from hypixeltools.auction import AuctionFilter, AuctionOrder, AuctionSnapshot
+from hypixeltools.store import AuctionStore, PriceLadder, auctionPrice
+from server import makePages
+
+
+def timeit(func, rounds: int = 15) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        gc.collect()
+        gc.disable()
+        begin = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - begin)
+        gc.enable()
+    return best
+
+
+def main(totalPages: int = 30):
+    raw = [_ for page in makePages(totalPages, 1000) for _ in json.loads(page)['auctions']]
+    auctions = {AuctionOrder(**_) for _ in raw}
+    for _ in raw[::10]:
+        _['highest_bid_amount'] = _.get('highest_bid_amount', 0) + 1000
+    updated = [AuctionOrder(**_) for _ in raw]
+    store = AuctionStore(auctions)
+    sample = raw[len(raw) // 2]
+    item, end = sample['item_name'], sample['end']
+    ladder = PriceLadder(auctions)
+
+    def lowestPrices():
+        ret = {}
+        for _ in auctions:
+            if _.bin and not _.claimed:
+                price = auctionPrice(_)
+                if ret.get(_.item_name, price) >= price:
+                    ret[_.item_name] = price
+        return ret
+
+    cases = (
+        ("cheapest BIN", lambda: min(AuctionFilter(
+            ('item_name', lambda _: _ == item), ('bin', bool), ('claimed', not_)
+        ).apply(auctions), key=auctionPrice, default=None),
+         lambda: store.cheapest(item)),
+        ("all lowest BIN", lowestPrices, ladder.lowestPrices),
+        ("ending in 60s", lambda: AuctionFilter(
+            ('end', lambda _: end <= _ < end + 60000)
+        ).apply(auctions), lambda: store.ending(60, end / 1000)),
+        ("legendary < 1M", lambda: AuctionFilter(
+            ('tier', lambda _: _ == 'LEGENDARY'), ('category', lambda _: _ == 'weapon'),
+            (('highest_bid_amount', 'starting_bid'), lambda bid, start: (bid or start) < 10 ** 6)
+        ).apply(auctions), lambda: store.query(
+            tier='LEGENDARY', category='weapon', price=(None, 10 ** 6)
+        ))
+    )
+    print("%d auctions" % (len(auctions),))
+    for name, scan, query in cases:
+        print("%-15s scan %8.3f ms  store %8.3f ms" % (
+            name, timeit(scan) * 1000, timeit(query) * 1000))
+
+    def sync():
+        store.sync(updated)
+        store.sync(auctions)
+    print("%-15s %8.1f ms" % ("sync, 10%", timeit(sync, 5) * 1000 / 2))
+    snapshots = AuctionSnapshot(updated), AuctionSnapshot(auctions)
+
+    def update():
+        for _ in snapshots:
+            ladder.sync(_)
+    print("%-15s %8.1f ms" % ("ladder, 10%", timeit(update, 5) * 1000 / 2))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
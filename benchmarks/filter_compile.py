@@ -0,0 +1,93 @@
+"""
+Per-auction cost of evaluating deep `AuctionFilter` trees, interpreted by
+
+`BaseFilter.__call__()`, as a compiled predicate, as a compiled predicate
+
+with the clauses reordered by `BaseFilter.plan()`, and as a vectorized mask
+
+over an `AuctionTable`.
+
+Usage: `python benchmarks/filter_compile.py [pages] [depth]`
+"""
+
+import gc
+import json
+import sys
+import time
+from operator import not_, truth
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from hypixeltools.auction import AuctionFilter, loadAuctionAPI
+from hypixeltools.table import AuctionTable
+from server import makePages
+
+
+def timeit(func, rounds: int = 15) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        gc.collect()
+        gc.disable()
+        begin = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - begin)
+        gc.enable()
+    return best
+
+
+def makeFilter(depth: int, lore: bool = True) -> AuctionFilter:
+    """
+    The filter of `watchAuction()` merged with `depth` levels of criteria,
+
+    with `bids` tested through `highest_bid_amount`, which tables store.
+
+    Lore criteria, which tables cannot evaluate, are left out unless `lore`.
+    """
+    ret = AuctionFilter(
+        (None, AuctionFilter(('bin', not_), ('claimed', not_), mode='and')),
+        (None, AuctionFilter(('bin', truth), ('highest_bid_amount', not_), mode='and')),
+        mode='or'
+    )
+    for level in range(depth):
+        clauses = [
+            ('tier', lambda tier, level=level: tier != ('COMMON', 'RARE')[level % 2]),
+            ('starting_bid', lambda bid, level=level: bid > 1000 * level),
+            (('end', 'start'), lambda end, start: end - start > 60000)
+        ]
+        if lore:
+            clauses.insert(0, ('item_lore', lambda text: 'ability' in text.lower()))
+        criteria = AuctionFilter(*clauses, mode='or' if level % 2 else 'and')
+        ret = ret.merge(criteria, mode='and')
+    return ret
+
+
+def main(totalPages: int = 10, depth: int = 6):
+    pages = [json.loads(_)['auctions'] for _ in makePages(totalPages, 1000)]
+    auctions = [_ for page in pages for _ in loadAuctionAPI(page)]
+    table = AuctionTable.fromAuctions(auctions)
+    count = len(auctions)
+    flt = makeFilter(depth)
+    columnar = makeFilter(depth, lore=False)
+    predicate = flt.compile()
+    planned = flt.plan(auctions[:500]).compile()
+    expected = [bool(flt(_)) for _ in auctions]
+    assert expected == [predicate(_) for _ in auctions]
+    assert expected == [planned(_) for _ in auctions]
+    assert columnar.mask(table).tolist() == [bool(columnar(_)) for _ in auctions]
+    cases = (
+        ("interpreted", lambda: [_ for _ in auctions if flt(_)]),
+        ("compiled", lambda: [_ for _ in auctions if predicate(_)]),
+        ("planned", lambda: [_ for _ in auctions if planned(_)]),
+        ("mask, no lore", lambda: table[columnar.mask(table)])
+    )
+    print("%d auctions, depth %d" % (count, depth))
+    for name, func in cases:
+        cost = timeit(func)
+        print("%-14s %8.1f ms  %6.3f us/auction" % (
+            name, cost * 1000, cost / count * 10 ** 6))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:3]))
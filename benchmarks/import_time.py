@@ -0,0 +1,56 @@
+"""
+Import cost of the package, and the heavy modules it pulls in.
+
+Usage: `python benchmarks/import_time.py [max_ms]`. Exits with status 1 if
+
+the median `import hypixeltools.network` takes longer than `max_ms`, or if
+
+importing it loads `requests` or `asyncio`.
+"""
+
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY = ("requests", "asyncio", "concurrent.futures")
+PROBE = """
+import sys, time
+begin = time.perf_counter()
+import %s
+print(time.perf_counter() - begin)
+print(",".join(_ for _ in %r if _ in sys.modules))
+"""
+
+
+def measure(module: str, rounds: int = 15):
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    timings, loaded = [], ""
+    for _ in range(rounds):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE % (module, HEAVY)],
+            env=env, cwd=str(ROOT), capture_output=True, text=True, check=True
+        ).stdout.split("\n")
+        timings.append(float(out[0]))
+        loaded = out[1]
+    return statistics.median(timings), loaded
+
+
+def main(limit: float = 10):
+    compileall.compile_dir(str(ROOT / "hypixeltools"), quiet=1)
+    status = 0
+    for module in ("hypixeltools", "hypixeltools.network", "hypixeltools.auction"):
+        cost, loaded = measure(module)
+        print("import %-22s %7.2f ms  heavy modules: %s" % (
+            module, cost * 1000, loaded if loaded else "none"))
+        if module == "hypixeltools.network" and (cost * 1000 > limit or loaded):
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main(*map(float, sys.argv[1:2])))
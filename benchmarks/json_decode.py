@@ -0,0 +1,95 @@
+"""
+Decode cost of each installed JSON backend over `skyblock/auctions` and
+
+`skyblock/profiles` payloads.
+
+Usage:
+
+* `python benchmarks/json_decode.py [payload.json ...]` times the given
+
+  recorded payloads, or synthetic ones when no file is given
+* `python benchmarks/json_decode.py --record KEY UUID DIR` records an
+
+  auctions page and the profiles of player `UUID` into `DIR`
+"""
+
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from hypixeltools import network
+from server import makePages
+
+
+def record(key: str, uuid: str, directory: str):
+    client = network.get_client()
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    for name, params in (("skyblock/auctions", {"key": key, "page": 0}),
+                         ("skyblock/profiles", {"key": key, "uuid": uuid})):
+        response = client.get(network.root_URL + name + network.arg_parser(**params))
+        target = path / (name.replace("/", "_") + ".json")
+        target.write_bytes(response.content)
+        print("recorded %s (%d bytes)" % (target, len(response.content)))
+
+
+def syntheticProfiles(seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    member = lambda: {
+        "stats": {"stat_%d" % i: rng.random() * 1000 for i in range(400)},
+        "collection": {"ITEM_%d" % i: rng.randint(0, 10 ** 6) for i in range(150)},
+        "inv_contents": {"type": 0, "data": "H4sIAAAAAAAAAO1d" * 2000},
+        "objectives": {
+            "objective_%d" % i: {"status": "COMPLETE", "progress": 0,
+                                 "completed_at": rng.randint(0, 10 ** 12)}
+            for i in range(200)
+        }
+    }
+    return json.dumps({
+        "success": True,
+        "profiles": [{
+            "profile_id": "%032x" % rng.getrandbits(128),
+            "cute_name": "Profile%d" % i,
+            "members": {"%032x" % rng.getrandbits(128): member() for _ in range(3)}
+        } for i in range(3)]
+    }).encode()
+
+
+def main(paths):
+    if paths:
+        payloads = {Path(_).name: Path(_).read_bytes() for _ in paths}
+    else:
+        payloads = {
+            "skyblock_auctions (synthetic)": makePages(1, 1000)[0],
+            "skyblock_profiles (synthetic)": syntheticProfiles()
+        }
+    backends = {}
+    for name in network.json_backends:
+        try:
+            backends[name] = network.get_decoder(name)
+        except ImportError:
+            print("%s: not installed" % (name,))
+
+    for payload, content in payloads.items():
+        print("%s, %.1f kB" % (payload, len(content) / 1024))
+        for name, decoder in backends.items():
+            rounds = 0
+            begin = time.perf_counter()
+            while rounds < 5 or time.perf_counter() - begin < 1:
+                decoder(content)
+                rounds += 1
+            cost = (time.perf_counter() - begin) / rounds
+            print("  %-8s %8.2f ms  %8.1f MB/s" % (
+                name, cost * 1000, len(content) / cost / 2 ** 20))
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--record"]:
+        record(*sys.argv[2:5])
+    else:
+        main(sys.argv[1:])
@@ -0,0 +1,70 @@
+"""
+Cost of price statistics over a long sales history: sorting the kept prices
+
+on each lookup versus the `QuantileSketch` objects of a `SalesHistory`, with
+
+the rank error of the sketch estimates.
+
+Usage: `python benchmarks/price_history.py [sales]`
+"""
+
+import gc
+import random
+import sys
+import time
+from bisect import bisect_right
+from pathlib import Path
+from statistics import median
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from hypixeltools.history import SalesHistory
+from server import ITEMS
+
+
+def timeit(func, rounds: int = 5) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        gc.collect()
+        gc.disable()
+        begin = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - begin)
+        gc.enable()
+    return best
+
+
+def main(totalSales: int = 500000):
+    rng = random.Random(0)
+    now = int(time.time() * 1000)
+    records = [{
+        "auction_id": "%032x" % rng.getrandbits(128),
+        "item_name": rng.choice(ITEMS),
+        "price": int(rng.lognormvariate(14, 1)),
+        "timestamp": now + i * 50,
+        "bin": True
+    } for i in range(totalSales)]
+    prices = {}
+    for _ in records:
+        prices.setdefault(_["item_name"], []).append(_["price"])
+    history = SalesHistory()
+    print("%d sales, %d items" % (totalSales, len(prices)))
+    print("%-15s %9.1f ms" % ("ingest", timeit(lambda: SalesHistory().extend(records), 1) * 1000))
+    history.extend(records)
+    item = ITEMS[0]
+    print("%-15s %9.3f ms  sketch %9.4f ms" % (
+        "median", timeit(lambda: median(prices[item])) * 1000,
+        timeit(lambda: [history.median(item) for _ in range(1000)])))
+    data = sorted(prices[item])
+    sketch = history.sketch(item, rolling=False)
+    error = max(
+        abs(bisect_right(data, sketch.quantile(q / 100)) / len(data) - q / 100)
+        for q in range(1, 100)
+    )
+    print("%-15s %9d values  sketch %9d values, rank error %.4f" % (
+        "memory", len(data), sum(len(_) for _ in sketch.compactors), error))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
@@ -0,0 +1,128 @@
+"""
+Local stand-in for the Hypixel API, used by the benchmarks.
+
+Serves `skyblock/auctions` pages of synthetic auctions with a configurable
+
+artificial latency, so network-bound code paths can be timed offline.
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+TIERS = ["COMMON", "UNCOMMON", "RARE", "EPIC", "LEGENDARY", "MYTHIC", "SPECIAL"]
+CATEGORIES = ["weapon", "armor", "accessories", "consumables", "blocks", "misc"]
+ITEMS = ["Aspect of the End", "Hyperion", "Juju Shortbow", "Azure Bluet",
+         "Enchanted Diamond", "Wither Goggles", "Terminator", "Spirit Sceptre"]
+
+
+def makeAuction(rng: random.Random, now: int) -> dict:
+    name = rng.choice(ITEMS)
+    tier = rng.choice(TIERS)
+    isBin = rng.random() < 0.7
+    bids = [] if isBin else [
+        {
+            "auction_id": "%032x" % rng.getrandbits(128),
+            "bidder": "%032x" % rng.getrandbits(128),
+            "profile_id": "%032x" % rng.getrandbits(128),
+            "amount": rng.randint(1, 10 ** 7),
+            "timestamp": now - rng.randint(0, 10 ** 6)
+        } for _ in range(rng.randint(0, 4))
+    ]
+    return {
+        "uuid": "%032x" % rng.getrandbits(128),
+        "auctioneer": "%032x" % rng.getrandbits(128),
+        "profile_id": "%032x" % rng.getrandbits(128),
+        "coop": [],
+        "start": now - rng.randint(0, 10 ** 8),
+        "end": now + rng.randint(0, 10 ** 8),
+        "item_name": name,
+        "item_lore": "§7Damage: §c+%d\n§7Strength: §c+%d\n\n§6§l%s" % (
+            rng.randint(1, 500), rng.randint(1, 500), tier),
+        "extra": name + " " + rng.choice(CATEGORIES),
+        "category": rng.choice(CATEGORIES),
+        "tier": tier,
+        "starting_bid": rng.randint(1, 10 ** 8),
+        "item_bytes": "H4sIAAAAAAAAAE1Ry27bMBBcx3Zsq0DbP+BFQE+" * 8,
+        "claimed": False,
+        "claimed_bidders": [],
+        "highest_bid_amount": max([_["amount"] for _ in bids], default=0),
+        "bin": isBin,
+        "bids": bids
+    }
+
+
+def makePages(totalPages: int = 60, pageSize: int = 1000, seed: int = 0):
+    rng = random.Random(seed)
+    now = int(time.time() * 1000)
+    pages = []
+    for page in range(totalPages):
+        pages.append(json.dumps({
+            "success": True,
+            "page": page,
+            "totalPages": totalPages,
+            "totalAuctions": totalPages * pageSize,
+            "lastUpdated": now,
+            "auctions": [makeAuction(rng, now) for _ in range(pageSize)]
+        }).encode())
+    return pages
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class StandInServer():
+    """
+    Threaded HTTP server answering `skyblock/auctions?page=N` from `pages`,
+
+    sleeping `latency` seconds before each response.
+    """
+
+    def __init__(self, pages, latency: float = 0.05):
+        self.pages = pages
+        self.latency = latency
+        self.requests = 0
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                owner.requests += 1
+                time.sleep(owner.latency)
+                url = urlparse(self.path)
+                page = int(parse_qs(url.query).get("page", ["0"])[0])
+                if 0 <= page < len(owner.pages):
+                    body = owner.pages[page]
+                else:
+                    body = b'{"success": false, "cause": "Page not found"}'
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "public, max-age=60")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = _Server(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return "http://127.0.0.1:%d/" % (self.server.server_address[1],)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,85 @@
+"""
+Size and speed of persisting an auction-house snapshot as JSON with
+
+`AuctionEncoder` versus the binary format of `writeSnapshot()`.
+
+Usage: `python benchmarks/snapshot_format.py [pages]`
+"""
+
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from hypixeltools.auction import AuctionEncoder, AuctionOrder, loadAuctionAPI
+from hypixeltools.snapshot import openSnapshot, writeSnapshot
+from server import makePages
+
+
+def timeit(func, rounds: int = 5) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        gc.collect()
+        gc.disable()
+        begin = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - begin)
+        gc.enable()
+    return best
+
+
+def main(totalPages: int = 30):
+    auctions = [
+        _ for page in makePages(totalPages, 1000)
+        for _ in loadAuctionAPI(json.loads(page)['auctions'])
+    ]
+    directory = tempfile.mkdtemp()
+    jsonPath = os.path.join(directory, "snapshot.json")
+    binaryPath = os.path.join(directory, "snapshot.bin")
+
+    def writeJSON():
+        with open(jsonPath, "w") as file:
+            json.dump(auctions, file, cls=AuctionEncoder)
+
+    def loadJSON():
+        with open(jsonPath) as file:
+            return [AuctionOrder(**_) for _ in json.load(file)]
+
+    def openBinary():
+        with openSnapshot(binaryPath) as snapshot:
+            return snapshot.columns['end'].max()
+
+    def tableBinary():
+        with openSnapshot(binaryPath) as snapshot:
+            return snapshot.toTable()
+
+    def loadBinary():
+        with openSnapshot(binaryPath) as snapshot:
+            return list(snapshot)
+
+    cases = (
+        ("json write", writeJSON),
+        ("binary write", lambda: writeSnapshot(binaryPath, auctions)),
+        ("json load", loadJSON),
+        ("binary open", openBinary),
+        ("binary table", tableBinary),
+        ("binary load", loadBinary)
+    )
+    print("%d auctions" % (len(auctions),))
+    for name, func in cases:
+        print("%-13s %9.2f ms" % (name, timeit(func) * 1000))
+    for path in (jsonPath, binaryPath):
+        print("%-13s %9.2f MiB" % (
+            os.path.basename(path), os.path.getsize(path) / 2 ** 20))
+        os.remove(path)
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
@@ -1,2 +1,48 @@
-from .network import *
-from .auction import *
\ No newline at end of file
+"""
+Tools based on the Hypixel API.
+
+Submodules are imported on first access to one of their names, so that
+
+importing the package stays cheap for short-lived processes.
+"""
+
+from importlib import import_module
+
+_submodules = ("network", "auction", "nbt", "store", "watch", "table", "snapshot", "pipeline", "history")
+
+# Names exported by each submodule. The API methods of `network` are
+# generated from a table, so the other names are looked up there.
+_exports = {
+    "auction": (
+        "AuctionOrder", "AuctionEncoder", "AuctionSweeper", "SweepResult",
+        "AuctionSnapshot", "AuctionDiff", "loadAuctionItems", "aiterAuctionPages",
+        "aiterAuctions", "iterAuctionPages", "iterAuctions", "loadAuctionPages",
+        "loadAuctionAPI", "AuctionFilter", "watchAuction"
+    ),
+    "nbt": ("ItemAttributes", "loadNBT", "parseItems", "decodeItems", "bulkDecodeItems"),
+    "store": ("AuctionStore", "PriceLadder", "auctionPrice"),
+    "watch": (
+        "AuctionEvent", "AuctionWatcher", "ProfileScheduler", "ProfileUpdate",
+        "aiterAuctionEvents", "LISTED", "BID_PLACED", "SOLD", "EXPIRED", "CLAIMED"
+    ),
+    "table": ("AuctionTable", "loadAuctionTable"),
+    "snapshot": ("SnapshotFile", "openSnapshot", "writeSnapshot"),
+    "pipeline": ("Channel", "runStages", "callProcessor"),
+    "history": ("QuantileSketch", "Sale", "ItemHistory", "SalesHistory", "SalesRecorder", "itemID")
+}
+_modules = {name: module for module, names in _exports.items() for name in names}
+
+def __getattr__(name: str):
+    if name == "__all__":
+        return [_ for module in _submodules
+                for _ in import_module("." + module, __name__).__all__]
+    if name in _submodules:
+        return import_module("." + name, __name__)
+    module = import_module("." + _modules.get(name, "network"), __name__)
+    if name in module.__all__:
+        globals()[name] = getattr(module, name)
+        return globals()[name]
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+def __dir__():
+    return sorted(set(globals()) | set(__getattr__("__all__")))
@@ -1,15 +1,22 @@
-from asyncio import Task, get_event_loop, wait
+from asyncio import FIRST_COMPLETED, Task, get_event_loop, wait
 from asyncio.tasks import sleep
 from base64 import standard_b64decode as b64decode
-from functools import reduce
+from concurrent.futures import Executor
 from json import JSONEncoder
-from operator import and_, or_, not_, truth
-from re import sub
-from time import time
-from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+from operator import not_, truth
+from re import compile as compilePattern
+from sys import intern
+from time import monotonic, time
+from typing import (Any, AsyncIterator, Callable, Dict, Iterable, Iterator,
+                    List, NamedTuple, Optional, Set, Tuple, Union)
 
 from .network import *
 from .comm import BaseFilter
+from .nbt import ItemAttributes, bulkDecodeItems, decodeItems
+from .pipeline import Channel, callProcessor, runStages
+
+
+_formatCode = compilePattern("§.")
 
 
 class AuctionOrder():
@@ -17,15 +24,101 @@ class AuctionOrder():
     Class representing an auction. The constructer accepts a series of keyword
     
     arguments, as returned by the Hypixel API.
+
+    Known fields are stored in slots, and `tier`, `category` and `item_name`
+
+    are interned, so the tens of thousands of auctions of a snapshot share a
+
+    single copy of each. Nested fields such as `bids` and `item_bytes` are
+
+    kept as returned by the API, except that empty `coop`, `claimed_bidders`
+
+    and `bids` lists are replaced by a shared empty tuple. Unknown fields are
+
+    kept in a side `dict` and remain readable as attributes.
+
+    The auction UUID (or `auction_id` for ended auctions) is parsed once into
+
+    the 128-bit integer `key`, used for hashing and equality.
+
+    Derived fields are computed on first access and cached: formatting codes
+
+    are stripped from `item_lore` when it is first read, and `getItemByte()`
+
+    and `getItem()` decode the item data once.
     """
 
+    _fields = (
+        'uuid', 'auctioneer', 'profile_id', 'coop', 'start', 'end', 'item_name',
+        'item_lore', 'extra', 'category', 'tier', 'starting_bid', 'item_bytes',
+        'claimed', 'claimed_bidders', 'highest_bid_amount', 'bin', 'bids',
+        'auction_id', 'seller', 'seller_profile', 'buyer', 'timestamp', 'price'
+    )
+    __slots__ = tuple(_ for _ in _fields if _ != 'item_lore') + (
+        'key', '_item_lore', '_lore_clean', '_item_data', '_item', '_others'
+    )
+    _interned = frozenset({'tier', 'category', 'item_name'})
+    _sequences = frozenset({'coop', 'claimed_bidders', 'bids'})
+    _plain = frozenset(_fields) - _interned - _sequences
+
     def __init__(self, **kwargs):
         self.bin = False
-        for _ in kwargs:
-            self.__setattr__(_, kwargs[_])
-        if 'item_lore' in kwargs:
-            self.item_lore = sub("§.", "", self.item_lore)
-        self.hash = None
+        self._item_data = None
+        self._item = None
+        self._others = None
+        plain = self._plain
+        for _, value in kwargs.items():
+            if _ in plain:
+                setattr(self, _, value)
+            elif _ in self._interned:
+                setattr(self, _, intern(value) if isinstance(value, str) else value)
+            elif _ in self._sequences:
+                setattr(self, _, value if value else ())
+            else:
+                if self._others is None:
+                    self._others = {}
+                self._others[_] = value
+        id = kwargs.get('uuid', None)
+        id = id if id else kwargs.get('auction_id', None)
+        try:
+            self.key = int(id.replace('-', ''), 16)
+        except (AttributeError, ValueError):
+            self.key = None
+
+    @property
+    def item_lore(self) -> str:
+        if not self._lore_clean:
+            lore = self._item_lore
+            self._item_lore = _formatCode.sub("", lore) if "§" in lore else lore
+            self._lore_clean = True
+        return self._item_lore
+
+    @item_lore.setter
+    def item_lore(self, value: str):
+        self._item_lore = value
+        self._lore_clean = False
+
+    def __getattr__(self, name: str) -> Any:
+        if name != '_others' and self._others and name in self._others:
+            return self._others[name]
+        raise AttributeError(
+            "'AuctionOrder' object has no attribute '%s'" % (name,)
+        )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return self.toDict()
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__init__(**state)
+
+    def toDict(self) -> Dict[str, Any]:
+        """
+        Returns the fields of the auction as a `dict`.
+        """
+        ret = {_: getattr(self, _) for _ in self._fields if hasattr(self, _)}
+        if self._others:
+            ret.update(self._others)
+        return ret
 
     def __hash__(self) -> int:
         """
@@ -33,24 +126,24 @@ class AuctionOrder():
 
         `__sub__()` operator.
         """
-        
-        if not self.hash:
-            id = getattr(self, "uuid", None)
-            id = id if id else getattr(self, "auction_id", None)
-            if not id:
-                raise ValueError("Malformed `AuctionOrder` object")
-            self.hash = reduce(
-                lambda x, y: x * 16 + y,
-                map(lambda _: ord(_.upper()) -
-                    (48 if _.isdigit() else 55), id)
-            ) + hash(id)
-        return self.hash
+        if self.key is None:
+            raise ValueError("Malformed `AuctionOrder` object")
+        return hash(self.key)
 
     def __eq__(self, o) -> bool:
-        try:
-            return self.auction_id == o.auction_id
-        except AttributeError:
-            return self.uuid == o.uuid
+        return self.key is not None and self.key == getattr(o, 'key', None)
+
+    def changedFrom(self, o: "AuctionOrder") -> bool:
+        """
+        Whether the auction received a bid or was claimed since `o`, an
+
+        earlier state of the same auction.
+        """
+        return (
+            getattr(self, 'highest_bid_amount', 0) != getattr(o, 'highest_bid_amount', 0)
+            or len(getattr(self, 'bids', ())) != len(getattr(o, 'bids', ()))
+            or getattr(self, 'claimed', False) != getattr(o, 'claimed', False)
+        )
     
     def __repr__(self) -> str:
         try:
@@ -71,7 +164,32 @@ class AuctionOrder():
         """
         Decode the item data, which is base64-encoded.
         """
-        return b64decode(self.item_bytes['data'])
+        if self._item_data is None:
+            data = self.item_bytes
+            self._item_data = b64decode(data['data'] if isinstance(data, dict) else data)
+        return self._item_data
+
+    def getItem(self) -> Optional[ItemAttributes]:
+        """
+        Decode the NBT item data into the attributes of the item, such as its
+
+        reforge, enchantments and stars. Identical payloads are decoded once.
+        """
+        if self._item is None:
+            items = decodeItems(self.getItemByte())
+            self._item = items[0] if items else None
+        return self._item
+
+def loadAuctionItems(auctions: Iterable[AuctionOrder], processes: Optional[int] = None):
+    """
+    Decode the items of many auctions at once on a pool of `processes`
+
+    processes, so that `getItem()` returns immediately afterwards.
+    """
+    auctions = [_ for _ in auctions if _._item is None]
+    for auction, items in zip(auctions, bulkDecodeItems(
+            [_.getItemByte() for _ in auctions], processes)):
+        auction._item = items[0] if items else None
 
 class AuctionFilter(BaseFilter):
 
@@ -97,7 +215,7 @@ class AuctionEncoder(JSONEncoder):
 
     def default(self, o: Any) -> Any:
         if isinstance(o, AuctionOrder):
-            return o.__dict__
+            return o.toDict()
         else:
             return super().default(o)
 
@@ -118,10 +236,7 @@ def loadAuctionAPI(response) -> Union[Set[AuctionOrder], AuctionOrder]:
     else:
         raise ValueError("Invalid parameter.")
 
-def loadAuctionPages(key: str, *pageRange: Tuple[int]) -> Set[AuctionOrder]:
-    """
-    Get all of the active auctions in the game asynchronously.
-    """
+def _parsePageRange(pageRange: Tuple[int]) -> Tuple[int, int, int]:
     start, end, step = 0, -1, 1
     if len(pageRange) == 0:
         pass
@@ -133,51 +248,399 @@ def loadAuctionPages(key: str, *pageRange: Tuple[int]) -> Set[AuctionOrder]:
         start, end, step = pageRange
     else:
         raise ValueError("loadAuctionPages() accepts up to 4 parameters.")
+    return start, end, step
+
+async def _asyncFetchPages(key: str, pages: Iterable[int]) -> Tuple[Dict[int, Dict], Dict[int, BaseException]]:
+    """
+    Fetch the given auction pages concurrently, returning the responses and
+
+    the exceptions of the failed pages.
+    """
+    tasks: Dict[int, Task] = {
+        i: Task(async_skyblock_auctions(key=key, page=i)) for i in pages
+    }
+    if tasks:
+        await wait(tasks.values())
+    failed = {i: task.exception() for i, task in tasks.items() if task.exception()}
+    return {i: task.result() for i, task in tasks.items() if i not in failed}, failed
+
+def _fetchPages(key: str, pages: Iterable[int]) -> Tuple[Dict[int, Dict], Dict[int, BaseException]]:
+    """
+    Synchronous version of `_asyncFetchPages()`.
+    """
+    return get_event_loop().run_until_complete(_asyncFetchPages(key, pages))
+
+class SweepResult(set):
+    """
+    `set` of auctions returned by `loadAuctionPages()`. The `failed` attribute
+
+    maps the pages which could not be fetched to their exception.
+    """
+
+    def __init__(self, auctions: Iterable[AuctionOrder] = (), failed: Optional[Dict[int, BaseException]] = None):
+        super().__init__(auctions)
+        self.failed = failed if failed is not None else {}
 
-    firstPage = skyblock_auctions(key=key, page=start)
+async def aiterAuctionPages(
+    key: str, *pageRange: Tuple[int], window: Optional[int] = None,
+    hedge: Optional[float] = None,
+    failed: Optional[Dict[int, BaseException]] = None) -> AsyncIterator[Tuple[int, List[AuctionOrder]]]:
+    """
+    Asynchronously iterate over the active auctions page by page, yielding
+
+    `(page, auctions)` tuples in the order the pages arrive. Parameters are
+
+    the same as `loadAuctionPages()`.
+
+    At most `window` pages (the concurrency of the client by default) are
+
+    requested or waiting to be consumed at once, so memory stays bounded
+
+    however slow the consumer is.
+
+    If `hedge` is given, e.g. `0.9`, a page still pending after that quantile
+
+    of the latencies observed so far is requested a second time, and the
+
+    first response wins. If `failed` is a `dict`, pages failing after the
+
+    retries of the client are recorded into it and skipped instead of
+
+    raising.
+    """
+    start, end, step = _parsePageRange(pageRange)
+    client = get_client()
+    window = window if window else client.concurrency
+
+    firstPage = await async_skyblock_auctions(key=key, page=start)
     if end < 0 or end > firstPage['totalPages']:
         end = firstPage['totalPages']
-    ret: List[Dict] = []
-    tasks: List[Task] = [
-        Task(async_skyblock_auctions(key=key, page=i))
-        for i in range(start + step, end, step)
-    ]
+    pages = iter(range(start + step, end, step))
+    pending: Dict[Task, int] = {}
+    started: Dict[int, float] = {}
+    hedged: Set[int] = set()
+    latencies: List[float] = []
+    # completion times, as the consumer may hold the generator at `yield`
+    finished: Dict[Task, float] = {}
+
+    def finish(task: Task):
+        if task in pending:
+            finished[task] = monotonic()
+
+    def track(task: Task, page: int):
+        pending[task] = page
+        task.add_done_callback(finish)
+
+    def schedule():
+        for i in pages:
+            track(Task(async_skyblock_auctions(key=key, page=i)), i)
+            started[i] = monotonic()
+            if len(started) >= window:
+                break
+
+    def threshold() -> Optional[float]:
+        if hedge is None or len(latencies) < 5:
+            return None
+        ordered = sorted(latencies)
+        return ordered[min(int(len(ordered) * hedge), len(ordered) - 1)]
 
+    schedule()
+    try:
+        auctions = firstPage['auctions']
+        del firstPage
+        yield start, [AuctionOrder(**_) for _ in auctions]
+        while pending:
+            limit, timeout = threshold(), None
+            if limit is not None:
+                waiting = [t for i, t in started.items() if i not in hedged]
+                if waiting:
+                    timeout = max(0, min(waiting) + limit - monotonic())
+            done, _ = await wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if limit is not None:
+                now = monotonic()
+                arrived = {pending[_] for _ in done}
+                for i, t in started.items():
+                    if i not in hedged and i not in arrived and now - t >= limit:
+                        hedged.add(i)
+                        track(Task(client.async_call(
+                            "skyblock/auctions", {'key': key, 'page': i}, shared=False
+                        )), i)
+            for task in done:
+                # a twin finishing in the same round was dropped with its page
+                page = pending.pop(task, None)
+                end = finished.pop(task, None)
+                if page is None:
+                    continue
+                error = None if task.cancelled() else task.exception()
+                if page not in started:
+                    continue
+                if error is not None:
+                    if page in pending.values():
+                        continue
+                    del started[page]
+                    if failed is None:
+                        raise error
+                    failed[page] = error
+                    schedule()
+                    continue
+                latencies.append((end or monotonic()) - started.pop(page))
+                for twin in [t for t, i in pending.items() if i == page]:
+                    twin.cancel()
+                    del pending[twin]
+                    finished.pop(twin, None)
+                auctions = task.result()['auctions']
+                schedule()
+                yield page, [AuctionOrder(**_) for _ in auctions]
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            # let the shared requests left without waiters be cancelled too
+            await wait(pending)
+
+async def aiterAuctions(key: str, *pageRange: Tuple[int], **kwargs) -> AsyncIterator[AuctionOrder]:
+    """
+    Asynchronously iterate over the active auctions as their pages arrive.
+
+    Keyword arguments are passed to `aiterAuctionPages()`.
+    """
+    async for _, auctions in aiterAuctionPages(key, *pageRange, **kwargs):
+        for _ in auctions:
+            yield _
+
+def iterAuctionPages(key: str, *pageRange: Tuple[int], **kwargs) -> Iterator[Tuple[int, List[AuctionOrder]]]:
+    """
+    Synchronous version of `aiterAuctionPages()`. Pages keep downloading in
+
+    the background while the caller processes the yielded ones.
+    """
     loop = get_event_loop()
-    loop.run_until_complete(wait(tasks))
+    pages = aiterAuctionPages(key, *pageRange, **kwargs)
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(pages.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.run_until_complete(pages.aclose())
+
+def iterAuctions(key: str, *pageRange: Tuple[int], **kwargs) -> Iterator[AuctionOrder]:
+    """
+    Synchronous version of `aiterAuctions()`.
+    """
+    for _, auctions in iterAuctionPages(key, *pageRange, **kwargs):
+        yield from auctions
+
+def loadAuctionPages(key: str, *pageRange: Tuple[int], hedge: Optional[float] = None) -> SweepResult:
+    """
+    Get all of the active auctions in the game asynchronously.
+
+    Pages failing after the retries of the client are left out and reported
+
+    in the `failed` attribute of the result. See `aiterAuctionPages()` for
+
+    `hedge`.
+    """
+    failed: Dict[int, BaseException] = {}
+    return SweepResult(iterAuctions(key, *pageRange, hedge=hedge, failed=failed), failed)
 
-    for task in tasks:
-        ret.append(task.result()['auctions'])
+class AuctionSweeper():
+    """
+    Stateful version of `loadAuctionPages()` for repeated sweeps of the
+
+    auction house. Parameters are the same as `loadAuctionPages()`.
+
+    `sweep()` returns the previous result without fetching further pages
+
+    while the `lastUpdated` field of the first page is unchanged. Otherwise
+
+    pages identical to the previous sweep reuse their parsed auctions, and
+
+    only the auctions whose data changed are parsed again.
+
+    Pages which could not be fetched keep their previous contents, are
+
+    reported in the `failed` attribute, and force the next sweep to refetch.
+    """
+
+    def __init__(self, key: str, *pageRange: Tuple[int]):
+        self.key = key
+        self.pageRange = _parsePageRange(pageRange)
+        self.lastUpdated: Optional[int] = None
+        self.auctions: Set[AuctionOrder] = set()
+        self.pages: Dict[int, Tuple[List[Dict], List[AuctionOrder]]] = {}
+        self.failed: Dict[int, BaseException] = {}
+        self.parsed = 0
+
+    def _parsePage(self, auctions: List[Dict], known: Dict[str, Tuple[Dict, AuctionOrder]]) -> List[AuctionOrder]:
+        ret = []
+        for _ in auctions:
+            prev = known.get(_.get('uuid'), None)
+            if prev is not None and prev[0] == _:
+                ret.append(prev[1])
+            else:
+                ret.append(AuctionOrder(**_))
+                self.parsed += 1
+        return ret
+
+    def sweep(self) -> Set[AuctionOrder]:
+        """
+        Get all of the active auctions, reusing the previous sweep where the
+
+        data is unchanged.
+        """
+        start, end, step = self.pageRange
+        firstPage = skyblock_auctions(key=self.key, page=start)
+        if firstPage['lastUpdated'] == self.lastUpdated:
+            return self.auctions
+        responses, failed = _fetchPages(self.key, self._remaining(firstPage))
+        return self._update(firstPage, responses, failed)
+
+    async def asyncSweep(self) -> Set[AuctionOrder]:
+        """
+        Asynchronous version of `sweep()`.
+        """
+        start, end, step = self.pageRange
+        firstPage = await async_skyblock_auctions(key=self.key, page=start)
+        if firstPage['lastUpdated'] == self.lastUpdated:
+            return self.auctions
+        responses, failed = await _asyncFetchPages(self.key, self._remaining(firstPage))
+        return self._update(firstPage, responses, failed)
 
-    ret.append(firstPage['auctions'])
-    return reduce(or_, map(loadAuctionAPI, ret))
+    def _remaining(self, firstPage: Dict) -> range:
+        start, end, step = self.pageRange
+        if end < 0 or end > firstPage['totalPages']:
+            end = firstPage['totalPages']
+        return range(start + step, end, step)
+
+    def _update(self, firstPage: Dict, responses: Dict[int, Dict], failed: Dict[int, BaseException]) -> Set[AuctionOrder]:
+        self.failed = failed
+        responses[self.pageRange[0]] = firstPage
+
+        known: Optional[Dict[str, Tuple[Dict, AuctionOrder]]] = None
+        pages = {}
+        for i, response in responses.items():
+            auctions = response['auctions']
+            prev = self.pages.get(i, None)
+            if prev is not None and prev[0] == auctions:
+                pages[i] = prev
+                continue
+            if known is None:
+                known = {
+                    raw.get('uuid'): (raw, order)
+                    for raws, orders in self.pages.values()
+                    for raw, order in zip(raws, orders)
+                }
+            pages[i] = (auctions, self._parsePage(auctions, known))
+        for i in self.failed:
+            if i in self.pages:
+                pages[i] = self.pages[i]
+        self.pages = pages
+        self.lastUpdated = None if self.failed else firstPage['lastUpdated']
+        self.auctions = {order for _ in pages.values() for order in _[1]}
+        return self.auctions
+
+class AuctionDiff(NamedTuple):
+    """
+    Changes between two snapshots: `added` and `removed` auctions, and
+
+    `(previous, current)` pairs of the auctions which `changed`.
+    """
+    added: List[AuctionOrder]
+    removed: List[AuctionOrder]
+    changed: List[Tuple[AuctionOrder, AuctionOrder]]
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+class AuctionSnapshot(dict):
+    """
+    Auctions keyed by their integer `key`.
+    """
+
+    def __init__(self, auctions: Iterable[AuctionOrder] = ()):
+        super().__init__((_.key, _) for _ in auctions)
+
+    def diff(self, prev: "AuctionSnapshot") -> AuctionDiff:
+        """
+        Compute the changes from `prev` to this snapshot in one linear pass.
+        """
+        added, changed = [], []
+        for key, auction in self.items():
+            old = prev.get(key, None)
+            if old is None:
+                added.append(auction)
+            elif auction is not old and auction.changedFrom(old):
+                changed.append((old, auction))
+        removed = [prev[_] for _ in prev.keys() - self.keys()]
+        return AuctionDiff(added, removed, changed)
 
 def defaultProcessor(prev: set, current: set):
-    if prev == current:
+    diff = AuctionSnapshot(current).diff(AuctionSnapshot(prev))
+    if not diff:
         print("No transactions")
         return None
-    for _ in prev - current:
+    for _ in diff.removed:
         if _.highest_bid_amount:
             print("%s sold at %d" % (_.item_name, _.highest_bid_amount))
         else:
             print("%s not sold" % (_.item_name,))
-    for _ in current - prev:
+    for old, new in diff.changed:
+        if new.highest_bid_amount != old.highest_bid_amount:
+            print("New bid for %s at %d" % (new.item_name, new.highest_bid_amount))
+        if new.claimed and not old.claimed:
+            print("%s claimed" % (new.item_name,))
+    for _ in diff.added:
         print("Auction for %s starts at %d" % (_.item_name, _.starting_bid))
     print("%d auctions remaining" % (len(current), ))
 
 
 def watchAuction(
     key: str, profile: str, processor: Callable = defaultProcessor, *,
-    interval: int = 30, timeout: int = -1, criteria: Optional[AuctionFilter] = None):
+    interval: int = 30, timeout: int = -1, criteria: Optional[AuctionFilter] = None,
+    clock: Optional[RefreshClock] = None, backlog: int = 1, policy: str = 'block',
+    offload: bool = False, executor: Optional[Executor] = None):
     loop = get_event_loop()
     loop.run_until_complete(
-        _watchAuction(key, profile, processor, interval=interval, timeout=timeout, criteria=criteria)
+        _watchAuction(key, profile, processor, interval=interval, timeout=timeout,
+                      criteria=criteria, clock=clock, backlog=backlog, policy=policy,
+                      offload=offload, executor=executor)
     )
 
 async def _watchAuction(
     key: str, profile: str, processor: Callable = defaultProcessor, *,
-    interval: int = 30, timeout: int = -1, criteria: Optional[AuctionFilter] = None):
-    prev, current = set(), set()
+    interval: int = 30, timeout: int = -1, criteria: Optional[AuctionFilter] = None,
+    clock: Optional[RefreshClock] = None, backlog: int = 1, policy: str = 'block',
+    offload: bool = False, executor: Optional[Executor] = None):
+    """
+    Poll the auctions of `profile`, passing each new state to `processor`.
+
+    Polls follow `clock`, a `RefreshClock` learning the refresh of the API
+
+    from the cache headers of the responses, so that each one comes just
+
+    after the data is refreshed. Without cache headers, polls start every
+
+    `interval` seconds. Pass a clock to read the measured `staleness`.
+
+    Fetching, filtering and processing run as concurrent stages joined by
+
+    `Channel` objects holding up to `backlog` items. When `processor` falls
+
+    behind, `policy` decides what happens to new states: `block` delays the
+
+    next poll, `drop` discards them, and `coalesce` replaces the waiting one.
+
+    Either way, each state is diffed against the last one `processor` saw,
+
+    so skipped states never hide changes. `processor` may be a coroutine
+
+    function; others run on the event loop, or on `executor` if `offload` is
+
+    set.
+    """
+    clock = clock if clock else RefreshClock(interval)
     mainFilter = AuctionFilter(
         (None, AuctionFilter(('bin', not_), ('claimed', not_), mode='and')),
         (None, AuctionFilter(('bin', truth), ('bids', not_), mode='and')),
@@ -185,14 +648,45 @@ async def _watchAuction(
     )
     if (criteria):
         mainFilter = mainFilter.merge(criteria, mode='and')
+    params = {'key': key, 'profile': profile}
+    responses = Channel(backlog, policy)
+    states = Channel(backlog, policy)
     startTime = time()
-    while timeout < 0 or startTime + timeout > time():
-        del prev
-        prev, current = current, mainFilter.apply(loadAuctionAPI(
-            skyblock_auction(key=key, profile=profile)['auctions']
-        ))
-        processor(prev, current)
-        await sleep(interval)
-
-__all__ = ['AuctionOrder', 'AuctionEncoder',
+
+    async def fetch():
+        try:
+            while timeout < 0 or startTime + timeout > time():
+                response = await async_skyblock_auction(**params)
+                fresh = clock.observe(
+                    response.get('lastUpdated', None),
+                    get_client().fresh_until('skyblock/auction', params)
+                )
+                if fresh:
+                    await responses.put(response['auctions'])
+                wait = clock.next_poll() - time()
+                if timeout >= 0:
+                    wait = min(wait, startTime + timeout - time())
+                await sleep(max(wait, 0))
+        finally:
+            await responses.close()
+
+    async def select():
+        try:
+            async for auctions in responses:
+                await states.put(mainFilter.apply(loadAuctionAPI(auctions)))
+        finally:
+            await states.close()
+
+    async def process():
+        # the last state processed, as dropped states were never seen
+        prev = set()
+        async for current in states:
+            await callProcessor(processor, prev, current, offload=offload, executor=executor)
+            prev = current
+
+    await runStages(fetch(), select(), process())
+
+__all__ = ['AuctionOrder', 'AuctionEncoder', 'AuctionSweeper', 'SweepResult',
+           'AuctionSnapshot', 'AuctionDiff', 'loadAuctionItems',
+           'aiterAuctionPages', 'aiterAuctions', 'iterAuctionPages', 'iterAuctions',
            'loadAuctionPages', 'loadAuctionAPI', 'AuctionFilter', 'watchAuction']
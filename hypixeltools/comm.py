@@ -1,6 +1,10 @@
 from abc import abstractmethod, abstractstaticmethod
-from operator import and_, or_
-from typing import Iterable
+from copy import copy
+from itertools import chain, islice
+from keyword import iskeyword
+from operator import not_, truth
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 class BaseFilter():
 
@@ -9,12 +13,10 @@ class BaseFilter():
         raise NotImplementedError()
 
     def __init__(self, *args, mode: str = 'and'):
+        self._version = 0
+        self._predicate = None
         self.filter = args
         self.mode = mode
-        if mode not in ['and', 'or']:
-            raise ValueError(
-                "Filter mode should be either 'and' or 'or', got %s" % (mode,)
-            )
         for arg, func in self.filter:
             if not callable(func):
                 raise ValueError(str(type(func)) + " object is not callable.")
@@ -26,25 +28,228 @@ class BaseFilter():
                     repr(set(arg) - self.getAttributeList())
                 )
 
+    @property
+    def filter(self) -> tuple:
+        return self._filter
+
+    @filter.setter
+    def filter(self, clauses: tuple):
+        self._filter = clauses
+        self._version += 1
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    @mode.setter
+    def mode(self, mode: str):
+        if mode not in ['and', 'or']:
+            raise ValueError(
+                "Filter mode should be either 'and' or 'or', got %s" % (mode,)
+            )
+        self._mode = mode
+        self._version += 1
+
+    def _signature(self) -> tuple:
+        """
+        Identifies the current state of the filter tree, changing whenever
+
+        the clauses or mode of this filter or a nested one are set.
+        """
+        return (id(self), self._version) + tuple(
+            func._signature() for _, func in self._filter if isinstance(func, BaseFilter)
+        )
+
     def __call__(self, o) -> bool:
-        oper = and_ if self.mode == "and" else or_
-        shortcut = oper(True, False)
-        ret = not shortcut
+        # the truthiness of the clauses decides, as in `compile()` and `mask()`
+        decisive = self.mode != "and"
         for arg, func in self.filter:
             if isinstance(func, BaseFilter):
-                ret = oper(ret, func(o))
+                ret = func(o)
             else:
                 if isinstance(arg, str):
                     arg = (arg,)
-                ret = oper(ret, func(*(getattr(o, attr, False)
-                                       for attr in arg)))
-            if ret == shortcut:
-                break
+                ret = func(*(getattr(o, attr, False) for attr in arg))
+            if bool(ret) == decisive:
+                return decisive
+        return not decisive
+
+    def _source(self, namespace: Dict[str, Any], direct: bool) -> str:
+        """
+        Python expression evaluating the filter on `o`, with the clause
+
+        functions bound in `namespace`. Nested filters are inlined.
+        """
+        joiner = " and " if self.mode == "and" else " or "
+        terms: List[str] = []
+        for arg, func in self.filter:
+            if isinstance(func, BaseFilter):
+                terms.append("(%s)" % (func._source(namespace, direct),))
+                continue
+            name = "f%d" % (len(namespace),)
+            namespace[name] = func
+            if isinstance(arg, str):
+                arg = (arg,)
+            terms.append("%s(%s)" % (name, ", ".join(
+                "o." + attr if direct and attr.isidentifier() and not iskeyword(attr)
+                else "getattr(o, %r, False)" % (attr,) for attr in arg
+            )))
+        if not terms:
+            return "True" if self.mode == "and" else "False"
+        return joiner.join(terms)
+
+    def compile(self) -> Callable[[Any], bool]:
+        """
+        Flatten the filter tree into a single predicate function with the
+
+        clauses inlined and short-circuited. Attributes are read directly,
+
+        falling back to `getattr(o, attr, False)` when one is missing.
+        """
+        namespace: Dict[str, Any] = {}
+        fast = self._source(namespace, True)
+        slow = self._source(namespace, False)
+        source = (
+            "def predicate(o):\n"
+            "    try:\n"
+            "        return bool(%s)\n"
+            "    except AttributeError:\n"
+            "        return bool(%s)\n" % (fast, slow)
+        )
+        exec(source, namespace)
+        return namespace["predicate"]
+
+    def mask(self, table) -> Any:
+        """
+        Evaluate the filter over a columnar table such as `AuctionTable`,
+
+        returning a boolean NumPy mask. Clauses are applied to whole columns
+
+        when possible; clauses over a single categorical column are evaluated
+
+        once per category. Raises `KeyError` for attributes the table does
+
+        not store as columns.
+        """
+        import numpy as np
+
+        size = len(table)
+        clauses = []
+        for arg, func in self.filter:
+            if isinstance(func, BaseFilter):
+                clauses.append(func.mask(table))
+                continue
+            if isinstance(arg, str):
+                arg = (arg,)
+            categorical = getattr(table, "categorical", ())
+            if len(arg) == 1 and arg[0] in categorical:
+                lookup = np.array(
+                    [bool(func(_)) for _ in table.categories[arg[0]]],
+                    dtype=np.bool_
+                )
+                clauses.append(lookup[table.columns[arg[0]]])
+                continue
+            columns = [
+                table.decode(_) if _ in categorical else table.column(_)
+                for _ in arg
+            ]
+            if func is not_:
+                result = np.logical_not(columns[0])
+            elif func is truth:
+                result = columns[0].astype(np.bool_)
+            else:
+                try:
+                    result = func(*columns)
+                except Exception:
+                    result = None
+                if not isinstance(result, np.ndarray) or result.shape != (size,):
+                    result = np.fromiter(
+                        (bool(func(*_)) for _ in zip(*columns)),
+                        dtype=np.bool_, count=size
+                    )
+            clauses.append(result.astype(np.bool_, copy=False))
+        if not clauses:
+            return np.full(size, self.mode == "and", dtype=np.bool_)
+        combine = np.logical_and if self.mode == "and" else np.logical_or
+        ret = clauses[0]
+        for _ in clauses[1:]:
+            ret = combine(ret, _)
         return ret
 
-    def apply(self, auctions: Iterable) -> Iterable:
-        iterType = type(auctions)
-        return iterType(filter(self, auctions))
+    def _measure(self, sample: Sequence) -> Tuple[float, float]:
+        predicate = self.compile()
+        begin = perf_counter()
+        passed = sum(map(predicate, sample))
+        cost = perf_counter() - begin
+        return cost / len(sample), passed / len(sample)
+
+    def plan(self, sample: Sequence) -> "BaseFilter":
+        """
+        Returns an equivalent filter with the clauses of every level reordered
+
+        by their cost and selectivity measured over `sample`, so that `and`
+
+        filters run first the cheap clauses that reject most objects, and `or`
+
+        filters the cheap clauses that accept most. Clause functions should
+
+        have no side effects, since the order they run in changes.
+        """
+        sample = list(sample)
+        ret = copy(self)
+        ret._predicate = None
+        if not sample:
+            return ret
+        ret.filter = tuple(
+            (arg, func.plan(sample) if isinstance(func, BaseFilter) else func)
+            for arg, func in self.filter
+        )
+        if len(ret.filter) < 2:
+            return ret
+        ranked = []
+        for i, (arg, func) in enumerate(ret.filter):
+            clause = copy(self)
+            clause.filter = ((arg, func),)
+            cost, passed = clause._measure(sample)
+            # expected cost per object decided by the clause
+            decided = 1 - passed if self.mode == "and" else passed
+            rank = cost / decided if decided > 0 else float("inf")
+            ranked.append((rank, i, (arg, func)))
+        ranked.sort(key=lambda _: _[:2])
+        ret.filter = tuple(_[2] for _ in ranked)
+        return ret
+
+    def apply(
+        self, auctions: Iterable, *, lazy: bool = False,
+        sample: Optional[int] = None) -> Iterable:
+        """
+        Returns the objects of `auctions` passing the filter, in a container
+
+        of the same type, or as an iterator consuming `auctions` on demand if
+
+        `lazy` is set.
+
+        If `sample` is given, the first `sample` objects are used to reorder
+
+        the clauses with `plan()` before filtering.
+        """
+        flt = self
+        if sample:
+            iterator = iter(auctions)
+            head = list(islice(iterator, sample))
+            flt = self.plan(head)
+            source = chain(head, iterator)
+        else:
+            source = auctions
+        # the predicate inlines the whole tree, so it is cached along with
+        # the state of the tree it was compiled from
+        signature = flt._signature()
+        if flt._predicate is None or flt._predicate[0] != signature:
+            flt._predicate = (signature, flt.compile())
+        ret: Iterator = filter(flt._predicate[1], source)
+        if lazy:
+            return ret
+        return type(auctions)(ret)
 
     def merge(self, o, mode: str = 'and'):
         return BaseFilter((None, self), (None, o), mode=mode)
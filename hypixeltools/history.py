@@ -0,0 +1,469 @@
+from bisect import bisect_left, bisect_right
+from collections import deque
+from itertools import accumulate
+from json import dumps
+from math import ceil
+from random import Random
+from typing import (Any, AsyncIterator, Callable, Deque, Dict, Iterable, List,
+                    NamedTuple, Optional, Tuple, Union)
+
+from .auction import AuctionOrder
+from .nbt import ItemAttributes
+from .network import RefreshClock, async_skyblock_auctions_ended, get_client
+
+
+class QuantileSketch():
+    """
+    KLL sketch of a stream of numbers, answering rank and quantile queries
+
+    within about `1.7 / k` of the total count with high probability, in
+
+    `O(k)` memory however many values are added.
+
+    Values go to a stack of compactors. When one is full, it is sorted and
+
+    every other value, starting at random, moves to the next level, where
+
+    each value stands for twice as many. Sketches of disjoint streams can be
+
+    merged into a sketch of their union with the same guarantee.
+
+    The sorted weighted values are cached between updates, so repeated
+
+    queries only cost a binary search over at most a few `k` values.
+    """
+
+    __slots__ = ('k', 'count', 'min', 'max', 'compactors', '_capacity', '_size', '_random', '_cdf')
+
+    def __init__(self, k: int = 200, values: Iterable[float] = (), *, seed: Optional[int] = None):
+        if k < 8:
+            raise ValueError("QuantileSketch k should be at least 8, got %d" % (k,))
+        self.k = k
+        self.count = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.compactors: List[List[float]] = [[]]
+        self._capacity = [k]
+        self._size = 0
+        self._random = Random(seed)
+        self._cdf: Optional[Tuple[List[float], List[int]]] = None
+        for _ in values:
+            self.add(_)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __repr__(self) -> str:
+        return "<QuantileSketch of %d values in %d>" % (self.count, self._size)
+
+    def _grow(self):
+        self.compactors.append([])
+        # lower levels get geometrically smaller capacities, by 2/3
+        height = len(self.compactors)
+        self._capacity = [
+            int(ceil(self.k * (2 / 3) ** (height - 1 - h))) + 1 for h in range(height)
+        ]
+
+    def _compress(self):
+        while self._size >= sum(self._capacity):
+            for h, compactor in enumerate(self.compactors):
+                if len(compactor) >= self._capacity[h]:
+                    if h + 1 == len(self.compactors):
+                        self._grow()
+                    compactor.sort()
+                    kept = compactor[-1] if len(compactor) % 2 else None
+                    if kept is not None:
+                        compactor.pop()
+                    self.compactors[h + 1].extend(compactor[self._random.getrandbits(1)::2])
+                    compactor.clear()
+                    if kept is not None:
+                        compactor.append(kept)
+                    break
+            self._size = sum(len(_) for _ in self.compactors)
+
+    def add(self, value: float):
+        """
+        Add one value to the sketch.
+        """
+        self.count += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        self.compactors[0].append(value)
+        self._size += 1
+        self._cdf = None
+        if self._size >= sum(self._capacity):
+            self._compress()
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """
+        Add the values summarized by `other` to this sketch, in place.
+        """
+        if not other.count:
+            return self
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for mine, theirs in zip(self.compactors, other.compactors):
+            mine.extend(theirs)
+        self.count += other.count
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._size = sum(len(_) for _ in self.compactors)
+        self._cdf = None
+        self._compress()
+        return self
+
+    def copy(self) -> "QuantileSketch":
+        ret = QuantileSketch(self.k)
+        return ret.merge(self)
+
+    def _weights(self) -> Tuple[List[float], List[int]]:
+        if self._cdf is None:
+            pairs = sorted(
+                (value, 1 << h) for h, compactor in enumerate(self.compactors)
+                for value in compactor
+            )
+            self._cdf = [_[0] for _ in pairs], list(accumulate(_[1] for _ in pairs))
+        return self._cdf
+
+    def rank(self, value: float) -> float:
+        """
+        Estimated fraction of the values lower than or equal to `value`.
+        """
+        if not self.count:
+            return 0.0
+        values, cumulative = self._weights()
+        i = bisect_right(values, value)
+        return cumulative[i - 1] / cumulative[-1] if i else 0.0
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimated `q`-quantile, e.g. the median for `0.5`, or `None` if empty.
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("quantile should be between 0 and 1, got %s" % (q,))
+        if not self.count:
+            return None
+        if q == 0:
+            return self.min
+        if q == 1:
+            return self.max
+        values, cumulative = self._weights()
+        i = bisect_left(cumulative, q * cumulative[-1])
+        return values[min(i, len(values) - 1)]
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[float]]:
+        return [self.quantile(_) for _ in qs]
+
+    def median(self) -> Optional[float]:
+        return self.quantile(0.5)
+
+
+class Sale(NamedTuple):
+    """
+    Sale recorded by `SalesHistory`, from a `skyblock_auctions_ended` record.
+
+    * `item`: key of the item, its SkyBlock ID by default
+    * `price`: price paid per item of the stack
+    * `timestamp`: time of the sale in milliseconds
+    """
+    auction_id: str
+    item: str
+    price: float
+    count: int
+    timestamp: int
+    bin: bool
+    seller: Optional[str]
+    buyer: Optional[str]
+
+
+def _decoded(auction: AuctionOrder) -> Optional[ItemAttributes]:
+    if getattr(auction, 'item_bytes', None) is None:
+        return None
+    try:
+        return auction.getItem()
+    except Exception:
+        return None
+
+
+def itemID(auction: AuctionOrder) -> Optional[str]:
+    """
+    SkyBlock ID of the item of `auction` from its `item_bytes`, falling back
+
+    to `item_name`, or `None` if neither can be read.
+    """
+    item = _decoded(auction)
+    if item is not None and item.id:
+        return item.id
+    return getattr(auction, 'item_name', None)
+
+
+class ItemHistory():
+    """
+    Sales of one item kept by `SalesHistory`.
+
+    `sales` holds the latest `keep` sales in order. Prices are summarized by
+
+    `total`, a `QuantileSketch` of every sale, and by one sketch per time
+
+    bucket, merged on demand into the `rolling()` sketch of the window.
+    """
+
+    def __init__(self, item: str, *, keep: int = 1000, bucket: float = 3600, k: int = 200):
+        self.item = item
+        self.k = k
+        self.bucket = int(bucket * 1000)
+        self.sales: Deque[Sale] = deque(maxlen=keep)
+        self.total = QuantileSketch(k)
+        self.buckets: Deque[Tuple[int, QuantileSketch]] = deque()
+        self._rolling: Optional[QuantileSketch] = None
+
+    def __len__(self) -> int:
+        return self.total.count
+
+    def __repr__(self) -> str:
+        return "<ItemHistory of %s, %d sales>" % (self.item, len(self))
+
+    def add(self, sale: Sale):
+        self.sales.append(sale)
+        self.total.add(sale.price)
+        start = sale.timestamp - sale.timestamp % self.bucket
+        if self.buckets and self.buckets[-1][0] >= start:
+            # late sales go to the newest bucket, as ended auctions come in order
+            self.buckets[-1][1].add(sale.price)
+        else:
+            self.buckets.append((start, QuantileSketch(self.k)))
+            self.buckets[-1][1].add(sale.price)
+        self._rolling = None
+
+    def expire(self, since: int):
+        """
+        Drop the buckets ending before `since`, in milliseconds.
+        """
+        while self.buckets and self.buckets[0][0] + self.bucket <= since:
+            self.buckets.popleft()
+            self._rolling = None
+
+    def rolling(self) -> QuantileSketch:
+        """
+        Sketch of the sales of the buckets left by `expire()`.
+        """
+        if self._rolling is None:
+            self._rolling = QuantileSketch(self.k)
+            for _, sketch in self.buckets:
+                self._rolling.merge(sketch)
+        return self._rolling
+
+
+class SalesHistory():
+    """
+    Per-item history of the sales read from `skyblock_auctions_ended`, with
+
+    price statistics over the last `window` seconds and over all time.
+
+    ```python
+    history = SalesHistory(window=86400)
+    history.extend(skyblock_auctions_ended(key=key)['auctions'])
+    history.median('HYPERION'), history.quantile('HYPERION', 0.1)
+    ```
+
+    Records are deduplicated by `auction_id` within `horizon` seconds, more
+
+    than the endpoint keeps them, so overlapping responses can be passed
+
+    as they come. Items are keyed by `itemKey`, by default `itemID()`.
+
+    Sales are appended to the item's `ItemHistory`, and to the file at `path`
+
+    as JSON lines if given, so the full history persists while memory stays
+
+    bounded by `keep` sales and the sketches of each item. The rolling window
+
+    is made of `buckets` sketches, and moves with the newest sale.
+    """
+
+    def __init__(
+        self, *, window: float = 86400, buckets: int = 24, k: int = 200, keep: int = 1000,
+        horizon: float = 600, path: Optional[str] = None,
+        itemKey: Callable[[AuctionOrder], Optional[str]] = itemID):
+        self.window = window
+        self.bucket = window / buckets
+        self.k = k
+        self.keep = keep
+        self.horizon = int(horizon * 1000)
+        self.path = path
+        self.itemKey = itemKey
+        self.items: Dict[str, ItemHistory] = {}
+        self.latest = 0
+        self.unknown = 0
+        self._seen: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __contains__(self, item: str) -> bool:
+        return item in self.items
+
+    def __getitem__(self, item: str) -> ItemHistory:
+        return self.items[item]
+
+    def _sale(self, record: Union[Dict[str, Any], AuctionOrder]) -> Optional[Sale]:
+        auction = record if isinstance(record, AuctionOrder) else AuctionOrder(**record)
+        price = getattr(auction, 'price', None)
+        id = getattr(auction, 'auction_id', None)
+        if id is None or price is None:
+            return None
+        item = self.itemKey(auction)
+        if item is None:
+            self.unknown += 1
+            return None
+        decoded = _decoded(auction)
+        count = max(decoded.count, 1) if decoded is not None else 1
+        return Sale(
+            id, item, price / count, count, getattr(auction, 'timestamp', None) or self.latest,
+            auction.bin, getattr(auction, 'seller', None), getattr(auction, 'buyer', None)
+        )
+
+    def add(self, record: Union[Dict[str, Any], AuctionOrder]) -> Optional[Sale]:
+        """
+        Record an ended auction, returning its `Sale`, or `None` if it was
+
+        already recorded or its item is unknown.
+        """
+        return next(iter(self.extend((record,))), None)
+
+    def extend(self, records: Iterable[Union[Dict[str, Any], AuctionOrder]]) -> List[Sale]:
+        """
+        Record many ended auctions, returning the new `Sale` objects.
+        """
+        new = []
+        seen = self._seen
+        for record in records:
+            id = record.get('auction_id', None) if isinstance(record, dict) \
+                else getattr(record, 'auction_id', None)
+            if id in seen:
+                continue
+            sale = self._sale(record)
+            if sale is None:
+                continue
+            seen[id] = sale.timestamp
+            self.latest = max(self.latest, sale.timestamp)
+            history = self.items.get(sale.item, None)
+            if history is None:
+                history = self.items[sale.item] = ItemHistory(
+                    sale.item, keep=self.keep, bucket=self.bucket, k=self.k
+                )
+            history.add(sale)
+            # items never queried must not keep buckets past the window
+            history.expire(self.latest - int(self.window * 1000))
+            new.append(sale)
+        horizon = self.latest - self.horizon
+        if new and min(seen.values()) < horizon:
+            self._seen = {k: v for k, v in seen.items() if v >= horizon}
+        if new and self.path:
+            with open(self.path, 'a') as file:
+                file.writelines(dumps(_._asdict(), separators=(',', ':')) + '\n' for _ in new)
+        return new
+
+    def sketch(self, item: str, rolling: bool = True) -> QuantileSketch:
+        """
+        Price sketch of `item` over the window, or over all time.
+        """
+        history = self.items.get(item, None)
+        if history is None:
+            return QuantileSketch(self.k)
+        if not rolling:
+            return history.total
+        history.expire(self.latest - int(self.window * 1000))
+        return history.rolling()
+
+    def quantile(self, item: str, q: float, rolling: bool = True) -> Optional[float]:
+        """
+        Estimated `q`-quantile of the price of `item`, or `None` without sales.
+        """
+        return self.sketch(item, rolling).quantile(q)
+
+    def median(self, item: str, rolling: bool = True) -> Optional[float]:
+        return self.quantile(item, 0.5, rolling)
+
+    def percentiles(
+        self, item: str, percentiles: Iterable[float] = (10, 25, 50, 75, 90),
+        rolling: bool = True) -> Dict[float, Optional[float]]:
+        """
+        Estimated percentiles of the price of `item`, by percentile.
+        """
+        sketch = self.sketch(item, rolling)
+        return {_: sketch.quantile(_ / 100) for _ in percentiles}
+
+
+class SalesRecorder():
+    """
+    Polls `skyblock_auctions_ended` into a `SalesHistory` without gaps.
+
+    The endpoint only returns the auctions ended in about the last minute,
+
+    so polls follow `clock`, a `RefreshClock` learning its refresh, to read
+
+    every refresh once. Refreshes further apart than `coverage` seconds may
+
+    have missed sales and are counted in `gaps`. Failed polls are retried
+
+    after `clock.retry` seconds, the last error being kept in `error`.
+
+    ```python
+    recorder = SalesRecorder(key)
+    async for sale in recorder:
+        print(sale.item, sale.price, recorder.history.median(sale.item))
+    ```
+    """
+
+    def __init__(
+        self, key: str, history: Optional[SalesHistory] = None, *,
+        clock: Optional[RefreshClock] = None, coverage: float = 60):
+        self.key = key
+        self.history = history if history is not None else SalesHistory()
+        self.clock = clock if clock else RefreshClock()
+        self.coverage = coverage
+        self.lastUpdated: Optional[int] = None
+        self.gaps = 0
+        self.error: Optional[BaseException] = None
+
+    def __aiter__(self) -> AsyncIterator[Sale]:
+        return self.sales()
+
+    async def refresh(self) -> List[Sale]:
+        """
+        Poll the endpoint once, returning the new sales.
+        """
+        params = {'key': self.key}
+        response = await async_skyblock_auctions_ended(**params)
+        lastUpdated = response.get('lastUpdated', None)
+        self.clock.observe(lastUpdated, get_client().fresh_until('skyblock/auctions_ended', params))
+        if lastUpdated is not None and lastUpdated == self.lastUpdated:
+            return []
+        if lastUpdated and self.lastUpdated \
+                and lastUpdated - self.lastUpdated > self.coverage * 1000:
+            self.gaps += 1
+        self.lastUpdated = lastUpdated or self.lastUpdated
+        return self.history.extend(response.get('auctions', []))
+
+    async def sales(self) -> AsyncIterator[Sale]:
+        """
+        Poll forever, yielding the new sales.
+        """
+        from asyncio import sleep
+        while True:
+            try:
+                sales = await self.refresh()
+            except Exception as e:
+                self.error = e
+                await sleep(self.clock.retry)
+                continue
+            self.error = None
+            for _ in sales:
+                yield _
+            await self.clock.async_wait()
+
+
+__all__ = ['QuantileSketch', 'Sale', 'ItemHistory', 'SalesHistory', 'SalesRecorder', 'itemID']
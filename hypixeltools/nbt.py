@@ -0,0 +1,208 @@
+from base64 import standard_b64decode as b64decode
+from collections import OrderedDict
+from hashlib import blake2b
+from struct import Struct, unpack_from
+from threading import Lock
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+from zlib import decompress
+
+_byte = Struct(">b")
+_short = Struct(">h")
+_ushort = Struct(">H")
+_int = Struct(">i")
+_long = Struct(">q")
+_float = Struct(">f")
+_double = Struct(">d")
+_scalars = {1: _byte, 2: _short, 3: _int, 4: _long, 5: _float, 6: _double}
+_formats = {1: "b", 2: "h", 3: "i", 4: "q", 5: "f", 6: "d"}
+
+
+def _decodeString(raw: bytes) -> str:
+    try:
+        return raw.decode("utf-8")
+    except UnicodeDecodeError:
+        # Java modified UTF-8: encoded NUL and CESU-8 surrogate pairs
+        text = raw.replace(b"\xc0\x80", b"\x00").decode("utf-8", "surrogatepass")
+        return text.encode("utf-16", "surrogatepass").decode("utf-16")
+
+
+def _readString(data: bytes, offset: int) -> Tuple[str, int]:
+    length, = _ushort.unpack_from(data, offset)
+    offset += 2
+    return _decodeString(data[offset:offset + length]), offset + length
+
+
+def _readPayload(tag: int, data: bytes, offset: int) -> Tuple[Any, int]:
+    if tag in _scalars:
+        scalar = _scalars[tag]
+        return scalar.unpack_from(data, offset)[0], offset + scalar.size
+    if tag == 8:
+        return _readString(data, offset)
+    if tag == 10:
+        ret = {}
+        while True:
+            child = data[offset]
+            offset += 1
+            if child == 0:
+                return ret, offset
+            name, offset = _readString(data, offset)
+            ret[name], offset = _readPayload(child, data, offset)
+    if tag == 9:
+        child = data[offset]
+        length, = _int.unpack_from(data, offset + 1)
+        offset += 5
+        if child in _formats and length > 0:
+            values = unpack_from(">%d%s" % (length, _formats[child]), data, offset)
+            return list(values), offset + length * _scalars[child].size
+        ret = []
+        for _ in range(max(length, 0)):
+            value, offset = _readPayload(child, data, offset)
+            ret.append(value)
+        return ret, offset
+    if tag == 7:
+        length, = _int.unpack_from(data, offset)
+        offset += 4
+        return data[offset:offset + length], offset + length
+    if tag == 11 or tag == 12:
+        length, = _int.unpack_from(data, offset)
+        offset += 4
+        size = 4 if tag == 11 else 8
+        values = unpack_from(">%d%s" % (length, "i" if tag == 11 else "q"), data, offset)
+        return list(values), offset + length * size
+    raise ValueError("Unknown NBT tag %d at offset %d" % (tag, offset))
+
+
+def loadNBT(data: bytes) -> Dict[str, Any]:
+    """
+    Parse an NBT document, gzip-compressed or not, in a single pass over
+
+    the buffer. Compounds become `dict` objects, lists and integer arrays
+
+    `list` objects, and byte arrays `bytes`. Returns the root compound.
+    """
+    if data[:2] == b"\x1f\x8b":
+        data = decompress(data, 47)
+    tag = data[0]
+    if tag != 10:
+        raise ValueError("NBT root should be a compound, got tag %d" % (tag,))
+    _, offset = _readString(data, 1)
+    return _readPayload(10, data, offset)[0]
+
+
+class ItemAttributes(NamedTuple):
+    """
+    Attributes of an item decoded from `item_bytes`.
+
+    * `id`: SkyBlock item ID, e.g. `HYPERION`
+    * `name`: display name, with formatting codes
+    * `count`: stack size
+    * `reforge`: reforge modifier, e.g. `heroic`, if any
+    * `enchantments`: enchantment name to level
+    * `stars`: dungeon stars
+    * `hotPotatoCount`: hot and fuming potato books applied
+    * `recombobulated`: whether the rarity was upgraded
+    * `attributes`: the full `ExtraAttributes` compound
+    """
+    id: Optional[str]
+    name: Optional[str]
+    count: int
+    reforge: Optional[str]
+    enchantments: Dict[str, int]
+    stars: int
+    hotPotatoCount: int
+    recombobulated: bool
+    attributes: Dict[str, Any]
+
+
+def parseItems(data: Union[str, bytes]) -> List[ItemAttributes]:
+    """
+    Decode an `item_bytes` payload, base64 `str` or decoded `bytes`, into
+
+    the attributes of each item it contains.
+    """
+    if isinstance(data, str):
+        data = b64decode(data)
+    ret = []
+    for item in loadNBT(data).get("i", []):
+        tag = item.get("tag", {})
+        extra = tag.get("ExtraAttributes", {})
+        ret.append(ItemAttributes(
+            extra.get("id", None),
+            tag.get("display", {}).get("Name", None),
+            item.get("Count", 1),
+            extra.get("modifier", None),
+            extra.get("enchantments", {}),
+            extra.get("upgrade_level", extra.get("dungeon_item_level", 0)),
+            extra.get("hot_potato_count", 0),
+            extra.get("rarity_upgrades", 0) > 0,
+            extra
+        ))
+    return ret
+
+
+_cache: "OrderedDict[bytes, List[ItemAttributes]]" = OrderedDict()
+_cacheLock = Lock()
+cacheSize = 65536
+
+
+def _digest(data: Union[str, bytes]) -> bytes:
+    return blake2b(data.encode() if isinstance(data, str) else data, digest_size=16).digest()
+
+
+def _remember(digest: bytes, items: List[ItemAttributes]):
+    with _cacheLock:
+        _cache[digest] = items
+        while len(_cache) > cacheSize:
+            _cache.popitem(last=False)
+
+
+def decodeItems(data: Union[str, bytes]) -> List[ItemAttributes]:
+    """
+    Cached version of `parseItems()`. Payloads are cached by a hash of their
+
+    content, so identical items listed by different auctions are decoded
+
+    once. Up to `cacheSize` payloads are kept, least recently used first out.
+    """
+    digest = _digest(data)
+    with _cacheLock:
+        if digest in _cache:
+            _cache.move_to_end(digest)
+            return _cache[digest]
+    ret = parseItems(data)
+    _remember(digest, ret)
+    return ret
+
+
+def bulkDecodeItems(
+    payloads: Iterable[Union[str, bytes]], processes: Optional[int] = None,
+    chunksize: int = 256) -> List[List[ItemAttributes]]:
+    """
+    Decode many payloads, e.g. a whole auction-house snapshot, spreading the
+
+    payloads missing from the cache over a pool of `processes` processes.
+
+    Results are in the order of `payloads` and are added to the cache.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    payloads = list(payloads)
+    digests = [_digest(_) for _ in payloads]
+    known: Dict[bytes, List[ItemAttributes]] = {}
+    missing: Dict[bytes, Union[str, bytes]] = {}
+    with _cacheLock:
+        for digest, payload in zip(digests, payloads):
+            if digest in _cache:
+                known[digest] = _cache[digest]
+            else:
+                missing[digest] = payload
+    if missing:
+        with ProcessPoolExecutor(processes) as pool:
+            decoded = pool.map(parseItems, missing.values(), chunksize=chunksize)
+            for digest, items in zip(missing, decoded):
+                known[digest] = items
+                _remember(digest, items)
+    return [known[_] for _ in digests]
+
+
+__all__ = ['ItemAttributes', 'loadNBT', 'parseItems', 'decodeItems', 'bulkDecodeItems']
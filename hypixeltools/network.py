@@ -1,7 +1,32 @@
-import json
-from typing import Callable
+"""
+Hypixel API methods.
 
-import requests
+The methods are declared in the `endpoints` table and created on first
+
+access, and the HTTP stack (`requests`, `asyncio`, worker pool) is only
+
+imported when the first request is sent, keeping the import cheap.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from functools import partial
+from importlib import import_module
+from sys import modules
+from os import replace
+from random import uniform
+from re import search
+from threading import Lock
+from time import monotonic, sleep, time
+from typing import (TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Hashable,
+                    Iterable, Iterator, Optional, Set, Tuple, Union)
+
+if TYPE_CHECKING:
+    from asyncio import AbstractEventLoop, Task
+    from concurrent.futures import Future
+
+    import requests
 
 root_URL = "http://api.hypixel.net/"
 mojang_URL = "https://sessionserver.mojang.com/session/minecraft/profile/"
@@ -19,30 +44,939 @@ class IllegalArgumentError(Exception):
     def __str__(self) -> str:
         return super().__str__()
 
-def api(e: Callable) -> Callable:
+
+json_backends = ("orjson", "ujson", "json")
+_decoders: Dict[str, Callable[[bytes], Any]] = {}
+
+def get_decoder(backend: Optional[str] = None) -> Callable[[bytes], Any]:
     """
-    Decorator for Hypixel API methods.
+    Returns the `loads` function of JSON library `backend`. Without an
+
+    argument, the fastest installed one of `json_backends` is returned,
+
+    falling back to the standard library.
     """
-    
-    name = e()
-    def ret(**kwargs):
-        api_name = name
-        ret = json.loads(
-            requests.get(root_URL + api_name + arg_parser(**kwargs)).content
+    for name in ((backend,) if backend else json_backends):
+        if name not in _decoders:
+            try:
+                _decoders[name] = import_module(name).loads
+            except ImportError:
+                if backend:
+                    raise
+                continue
+        return _decoders[name]
+    return import_module("json").loads
+
+
+class RateLimiter():
+    """
+    Thread-safe token bucket keeping the requests sent with an API key under
+
+    the per-minute limit of the key. Requests exceeding the budget are queued
+
+    (delayed) rather than rejected.
+
+    The bucket refills at `limit / period` tokens per second and is clamped
+
+    by the `RateLimit-Remaining` and `RateLimit-Reset` headers of every
+
+    response, keeping `margin` requests of headroom. Use `from_key()` to seed
+
+    it from the `key` endpoint.
+    """
+
+    def __init__(self, limit: int = 120, period: float = 60, *, margin: int = 1):
+        self.margin = margin
+        self.period = period
+        self.pending = 0
+        self.lock = Lock()
+        self.set_limit(limit)
+        self.tokens = self.capacity
+        self.stamp = monotonic()
+
+    @classmethod
+    def from_key(cls, key: str, *, client=None, margin: int = 1) -> "RateLimiter":
+        """
+        Create a limiter from the `limit` and `queriesInPastMin` fields
+
+        returned by the `key` endpoint.
+        """
+        record = endpoint("key")(key=key, client=client)["record"]
+        ret = cls(record['limit'], margin=margin)
+        ret.tokens = min(ret.capacity, record['limit'] - record['queriesInPastMin'] - margin)
+        return ret
+
+    def set_limit(self, limit: int):
+        self.limit = limit
+        self.capacity = max(limit - self.margin, 1)
+        self.rate = limit / self.period
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def reserve(self) -> float:
+        """
+        Take a token, returning the number of seconds to wait before sending.
+        """
+        with self.lock:
+            self._refill(monotonic())
+            self.tokens -= 1
+            self.pending += 1
+            return 0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def release(self, headers):
+        """
+        Complete a reserved request, syncing the bucket with the rate-limit
+
+        headers of its response.
+        """
+        with self.lock:
+            self.pending -= 1
+            if 'RateLimit-Limit' in headers:
+                limit = int(headers['RateLimit-Limit'])
+                if limit != self.limit:
+                    self.set_limit(limit)
+            if 'RateLimit-Remaining' not in headers:
+                return
+            self._refill(monotonic())
+            remaining = int(headers['RateLimit-Remaining']) - self.margin
+            if remaining <= 0 and 'RateLimit-Reset' in headers:
+                remaining = min(remaining, -float(headers['RateLimit-Reset']) * self.rate)
+            self.tokens = min(self.tokens, remaining - self.pending)
+
+    def pause(self, delay: float):
+        """
+        Drain the bucket so that no request is sent for `delay` seconds, e.g.
+
+        until the reset advertised by a 429 Too Many Requests response.
+        """
+        with self.lock:
+            self._refill(monotonic())
+            self.tokens = min(self.tokens, -delay * self.rate)
+
+    def refund(self):
+        """
+        Give back the token of a reserved request which was never sent.
+        """
+        with self.lock:
+            self.pending -= 1
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+    def acquire(self):
+        delay = self.reserve()
+        try:
+            sleep(delay)
+        except BaseException:
+            self.refund()
+            raise
+
+    async def async_acquire(self):
+        from asyncio import sleep as async_sleep
+        delay = self.reserve()
+        try:
+            await async_sleep(delay)
+        except BaseException:
+            # cancelled while queued: the request will not be sent
+            self.refund()
+            raise
+
+
+class ResponseCache():
+    """
+    LRU cache of decoded API responses, keyed on endpoint and parameters.
+
+    An entry lives as long as the `Cache-Control: max-age` of its response
+
+    allows, or, for responses without one, until `refresh` seconds after
+
+    the `lastUpdated` field of the body, or for `ttls[endpoint]` seconds,
+
+    whichever is later. `endpoint` is the API method name, or its first path
+
+    component such as `resources`, and `ttl` applies to the methods not in
+
+    `ttls`. Responses with none of these, and those marked `no-store` or
+
+    `no-cache`, are not cached. The cache holds at most
+
+    `max_bytes` of response bodies, evicting the least recently used entries.
+
+    Cached responses are shared between callers and should not be modified.
+
+    If `path` is given, entries are loaded from it on construction and
+
+    written back by `save()`, so a restarted process starts warm.
+    """
+
+    # `lastUpdated` of resources is when the file was edited, and gamecounts
+    # and leaderboards have none
+    default_ttls = {"resources": 3600, "gamecounts": 60, "leaderboards": 300}
+
+    def __init__(
+        self, max_bytes: int = 256 * 2 ** 20, *, refresh: float = 60,
+        ttl: Optional[float] = None, ttls: Optional[Dict[str, float]] = None,
+        path: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+        self.ttl = ttl
+        self.ttls = dict(self.default_ttls if ttls is None else ttls)
+        self.path = path
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+        self.entries: "OrderedDict[Hashable, Tuple[float, int, Dict]]" = OrderedDict()
+        if path:
+            import pickle
+            try:
+                with open(path, "rb") as f:
+                    entries = pickle.load(f)
+            except FileNotFoundError:
+                entries = {}
+            now = time()
+            for key, entry in entries.items():
+                if entry[0] > now:
+                    self._insert(key, entry)
+
+    @staticmethod
+    def make_key(name: str, params: Dict) -> Hashable:
+        return (name, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+    @staticmethod
+    def max_age(response: requests.Response) -> Optional[float]:
+        """
+        Returns the Unix time at which `response` goes stale according to its
+
+        `Cache-Control` and `Age` headers, 0 if it should not be cached at all,
+
+        and `None` if the headers do not say.
+        """
+        control = response.headers.get('Cache-Control', '')
+        if 'no-store' in control or 'no-cache' in control:
+            return 0
+        age = search(r"max-age=(\d+)", control)
+        if age:
+            return time() + int(age.group(1)) - int(response.headers.get('Age', 0))
+        return None
+
+    def lifetime(self, name: str) -> Optional[float]:
+        """
+        Returns the TTL of responses of API method `name` without cache
+
+        headers, `None` if there is none.
+        """
+        ret = self.ttls.get(name, None)
+        if ret is None:
+            ret = self.ttls.get(name.split("/", 1)[0], self.ttl)
+        return ret
+
+    def expiry(self, response: requests.Response, content: Dict, name: str = "") -> float:
+        """
+        Returns the Unix time at which `content`, returned by API method
+
+        `name`, goes stale, 0 if it should not be cached at all.
+        """
+        ret = self.max_age(response)
+        if ret is not None:
+            return ret
+        ret = 0
+        if isinstance(content.get('lastUpdated'), int):
+            ret = content['lastUpdated'] / 1000 + self.refresh
+        ttl = self.lifetime(name)
+        if ttl is not None:
+            ret = max(ret, time() + ttl)
+        return ret
+
+    def _insert(self, key: Hashable, entry: Tuple[float, int, Dict]):
+        if key in self.entries:
+            self.size -= self.entries.pop(key)[1]
+        self.entries[key] = entry
+        self.size += entry[1]
+        while self.size > self.max_bytes and self.entries:
+            self.size -= self.entries.popitem(last=False)[1][1]
+
+    def get(self, key: Hashable) -> Optional[Dict]:
+        with self.lock:
+            entry = self.entries.get(key, None)
+            if entry is not None and entry[0] > time():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            if entry is not None:
+                self.size -= self.entries.pop(key)[1]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, response: requests.Response, content: Dict):
+        expires = self.expiry(response, content, key[0] if isinstance(key, tuple) else "")
+        size = len(response.content)
+        if expires <= time() or size > self.max_bytes:
+            return
+        with self.lock:
+            self._insert(key, (expires, size, content))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def save(self):
+        """
+        Write the unexpired entries to `path`.
+        """
+        if not self.path:
+            raise ValueError("ResponseCache was created without a path")
+        with self.lock:
+            now = time()
+            entries = {k: v for k, v in self.entries.items() if v[0] > now}
+        import pickle
+        with open(self.path + ".tmp", "wb") as f:
+            pickle.dump(entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+        replace(self.path + ".tmp", self.path)
+
+
+class RefreshClock():
+    """
+    Learns when an endpoint refreshes its data, to poll it just after each
+
+    refresh instead of at a fixed interval drifting against it.
+
+    Each response is passed to `observe()` with its `lastUpdated` field and
+
+    the time until which its cache headers declare it fresh, as returned by
+
+    `Client.fresh_until()`. The refresh period, `period` seconds until
+
+    learned, is estimated from the gaps between the distinct refreshes
+
+    observed: gaps spanning refreshes missed between polls are collapsed
+
+    into multiples of the shortest one, and the median is taken. As a
+
+    period guessed too long is never contradicted by polls at that period,
+
+    every `probe` refreshes one poll is made halfway through the period,
+
+    including the first one. Set `probe` to 0 to disable probing.
+
+    `next_poll()` then returns the time of the next expected refresh plus
+
+    `delay` seconds, or `retry` seconds from now while an expected refresh is
+
+    late. `staleness` holds the age of the most recent new responses when
+
+    fetched, in seconds.
+    """
+
+    # shorter gaps are taken for clock jitter rather than refreshes
+    shortest = 1.0
+
+    def __init__(
+        self, period: float = 60, *, delay: float = 0.5, retry: float = 2,
+        probe: int = 16):
+        self.period = period
+        self.delay = delay
+        self.retry = retry
+        self.probe = probe
+        self.since = probe
+        self.updated: Optional[float] = None
+        self.fresh: Optional[float] = None
+        self.fetched: Optional[float] = None
+        self.gaps: "deque[float]" = deque(maxlen=16)
+        self.staleness: "deque[float]" = deque(maxlen=64)
+
+    def observe(
+        self, last_updated: Optional[int] = None, fresh_until: Optional[float] = None,
+        fetched: Optional[float] = None) -> bool:
+        """
+        Record a response fetched at Unix time `fetched`, now by default.
+
+        Returns whether it holds data newer than any seen before, always
+
+        `True` when neither `last_updated` nor `fresh_until` is known.
+        """
+        fetched = fetched if fetched else time()
+        self.fetched = fetched
+        if self.updated is not None and fetched < self.updated + self.period:
+            # polled before the expected refresh: a probe, or a restart
+            self.since = 0
+        previous = self.fresh
+        if last_updated:
+            updated = last_updated / 1000
+        elif fresh_until:
+            # refreshes are only seen through the cache lifetime
+            updated = fresh_until - self.period
+            if previous is not None and abs(fresh_until - previous) < 1:
+                updated = self.updated
+        else:
+            return True
+        if self.updated is not None and updated < self.updated:
+            # served by a lagging replica: older than what was already seen
+            return False
+        self.fresh = fresh_until if fresh_until else None
+        if updated == self.updated:
+            return False
+        if self.updated is not None:
+            if last_updated:
+                self.learn(updated - self.updated)
+            elif previous is not None:
+                self.learn(fresh_until - previous)
+        self.since += 1
+        self.updated = updated
+        self.staleness.append(max(fetched - updated, 0))
+        return True
+
+    def learn(self, gap: float):
+        """
+        Record a `gap` seconds long between two refreshes and update `period`.
+        """
+        if gap < self.shortest:
+            return
+        self.gaps.append(gap)
+        base = min(self.gaps)
+        # refreshes missed between polls show up as multiples of the period
+        collapsed = sorted(_ / max(round(_ / base), 1) for _ in self.gaps)
+        self.period = collapsed[len(collapsed) // 2]
+
+    def next_poll(self, now: Optional[float] = None) -> float:
+        """
+        Unix time at which to poll next.
+        """
+        now = now if now else time()
+        if self.fresh and self.fresh + self.delay > now:
+            return self.fresh + self.delay
+        if self.updated is not None:
+            expected = self.updated + self.period + self.delay
+            if self.probe and self.since >= self.probe:
+                probe = self.updated + self.period / 2 + self.delay
+                if probe > now:
+                    return probe
+            return expected if expected > now else now + self.retry
+        if self.fetched is not None:
+            return max(self.fetched + self.period, now)
+        return now
+
+    async def async_wait(self):
+        """
+        Sleep until `next_poll()`.
+        """
+        from asyncio import sleep as async_sleep
+        await async_sleep(max(self.next_poll() - time(), 0))
+
+
+class _Call():
+    """
+    API call in flight: the future of its result, the event loop performing
+
+    it, `None` for a blocking call, the task performing it on that loop, and
+
+    the number of callers waiting for it.
+    """
+
+    __slots__ = ('future', 'loop', 'task', 'waiters')
+
+    def __init__(self, loop: Optional[AbstractEventLoop] = None):
+        from concurrent.futures import Future
+
+        self.future: Future = Future()
+        self.loop = loop
+        self.task: Optional[Task] = None
+        self.waiters = 1
+
+
+class Client():
+    """
+    HTTP client shared by the API methods. It holds a pooled keep-alive
+
+    session requesting compressed responses, and a worker pool running the
+
+    requests of the `async_*` methods.
+
+    Parameters:
+
+    * `pool_size`: connections kept alive per host
+    * `concurrency`: requests in flight at once, defaults to `pool_size`
+    * `timeout`: `(connect, read)` timeout in seconds, or a single number
+    * `session`: an existing `requests.Session` to use instead of a new one,
+
+      used as is: its adapters and headers are left untouched
+    * `limiter`: `RateLimiter` shared by the requests carrying an API key,
+
+      a default 120 requests per minute one is created if omitted. Set the
+
+      `limiter` attribute to `None` to disable rate limiting.
+    * `cache`: optional `ResponseCache` consulted before sending requests
+    * `decoder`: function decoding response bodies, `get_decoder()` by default
+    * `retries`: times a request failing with a connection error, a timeout
+
+      or a 5xx status is retried, after a jittered exponential backoff of
+
+      `backoff * 2 ** attempt` seconds at most
+
+    Identical API calls in flight at the same time, from any thread or event
+
+    loop, are coalesced into a single request whose result they share. A
+
+    blocking call made on the thread of the event loop performing an
+
+    identical `async_*` call, or while that loop is not running, sends its
+
+    own request instead, as waiting for the shared one could hang.
+
+    Cancelling one of the `async_*` callers leaves the shared request running
+
+    for the others, and cancelling the last one cancels the request.
+    """
+
+    throttle_retries = 3
+    retry_statuses = frozenset({500, 502, 503, 504, 520, 521, 522, 524})
+
+    def __init__(
+        self, *, pool_size: int = 16, concurrency: Optional[int] = None,
+        timeout: Union[float, Tuple[float, float]] = (3.05, 30),
+        session: Optional[requests.Session] = None,
+        limiter: Optional[RateLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+        decoder: Optional[Callable[[bytes], Any]] = None,
+        retries: int = 2, backoff: float = 0.5):
+        from concurrent.futures import ThreadPoolExecutor
+
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        concurrency = concurrency if concurrency else pool_size
+        if pool_size < 1 or concurrency < 1:
+            raise ValueError(
+                "Pool size and concurrency should be positive, got %d and %d"
+                % (pool_size, concurrency)
+            )
+        self.pool_size = pool_size
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.transient_errors = (requests.ConnectionError, requests.Timeout)
+        self.backoff = backoff
+        self.limiter = limiter if limiter else RateLimiter()
+        self.cache = cache
+        self.decoder = decoder if decoder else get_decoder()
+        self.inflight: Dict[Hashable, _Call] = {}
+        self.inflight_lock = Lock()
+        self.background: Set["Task"] = set()
+        self.fresh: "OrderedDict[Hashable, float]" = OrderedDict()
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({
+                "Accept-Encoding": "gzip, deflate",
+                "Connection": "keep-alive"
+            })
+        self.session = session
+        self.executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="hypixeltools"
         )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+    def _send(self, url: str, params: Optional[Dict], limiter: Optional[RateLimiter], **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        try:
+            response = self.session.get(url, params=params, **kwargs)
+        except BaseException:
+            if limiter:
+                limiter.release({})
+            raise
+        if limiter:
+            limiter.release(response.headers)
+        return response
+
+    def retry_after(self, response: requests.Response, throttled: int = 0) -> float:
+        """
+        Seconds to wait before retrying a request answered with 429 Too Many
+
+        Requests, read from its `Retry-After` header, or else its
+
+        `RateLimit-Reset` header. Without either, the `throttled`-th retry
+
+        waits `backoff * 2 ** throttled` seconds.
+        """
+        value = response.headers.get('Retry-After', None)
+        if value is not None:
+            try:
+                return max(float(value), 0)
+            except ValueError:
+                from email.utils import parsedate_to_datetime
+                try:
+                    return max(parsedate_to_datetime(value).timestamp() - time(), 0)
+                except (TypeError, ValueError):
+                    pass
+        value = response.headers.get('RateLimit-Reset', None)
+        if value is not None:
+            try:
+                return max(float(value), 0)
+            except ValueError:
+                pass
+        return self.backoff * 2 ** throttled
+
+    def _retry(self, attempt: int, throttled: int, response: Optional[requests.Response],
+               limiter: Optional[RateLimiter]) -> Optional[float]:
+        """
+        Returns the delay before retrying a request, `None` if it should not
+
+        be retried. `response` is `None` if the request raised.
+        """
+        if response is not None and response.status_code == 429 and limiter:
+            if throttled >= self.throttle_retries:
+                return None
+            # wait through the limiter, so that other requests wait as well
+            limiter.pause(self.retry_after(response, throttled))
+            return 0
+        if response is not None and response.status_code not in self.retry_statuses:
+            return None
+        if attempt >= self.retries:
+            return None
+        return uniform(0, self.backoff * 2 ** attempt)
+
+    def get(
+        self, url: str, params: Optional[Dict] = None, *,
+        limited: bool = True, **kwargs) -> requests.Response:
+        """
+        Blocking GET request through the pooled session. Unless `limited` is
+
+        `False`, the request waits for the rate limiter and is retried when the
+
+        server answers 429 Too Many Requests, once its `retry_after()` delay
+
+        has passed. Transient failures are retried
+
+        as configured by `retries` and `backoff`.
+        """
+        limiter = self.limiter if limited else None
+        attempt, throttled = 0, 0
+        while True:
+            if limiter:
+                limiter.acquire()
+            response = None
+            try:
+                response = self._send(url, params, limiter, **kwargs)
+            except self.transient_errors:
+                delay = self._retry(attempt, throttled, None, limiter)
+                if delay is None:
+                    raise
+            else:
+                delay = self._retry(attempt, throttled, response, limiter)
+                if delay is None:
+                    return response
+            if response is not None and response.status_code == 429:
+                throttled += 1
+            else:
+                attempt += 1
+            sleep(delay)
+
+    async def async_get(
+        self, url: str, params: Optional[Dict] = None, *,
+        limited: bool = True, **kwargs) -> requests.Response:
+        """
+        Non-blocking GET request. The request runs on a worker thread, at most
+
+        `concurrency` at a time, so the event loop is free meanwhile. Rate
+
+        limiting and retry backoff are waited for on the event loop.
+        """
+        from asyncio import get_event_loop, sleep as async_sleep
+
+        limiter = self.limiter if limited else None
+        attempt, throttled = 0, 0
+        while True:
+            if limiter:
+                await limiter.async_acquire()
+            response = None
+            try:
+                response = await get_event_loop().run_in_executor(
+                    self.executor, partial(self._send, url, params, limiter, **kwargs)
+                )
+            except self.transient_errors:
+                delay = self._retry(attempt, throttled, None, limiter)
+                if delay is None:
+                    raise
+            else:
+                delay = self._retry(attempt, throttled, response, limiter)
+                if delay is None:
+                    return response
+            if response is not None and response.status_code == 429:
+                throttled += 1
+            else:
+                attempt += 1
+            await async_sleep(delay)
+
+    def decode(self, response: requests.Response) -> Dict[str, Any]:
+        """
+        Decode an API response, raising `IllegalArgumentError` on failure.
+        """
+        ret = self.decoder(response.content)
         if ret['success']:
             return ret
+        raise IllegalArgumentError(ret['cause'])
+
+    def _remember(self, key: Hashable, response: requests.Response):
+        fresh = ResponseCache.max_age(response)
+        with self.inflight_lock:
+            if fresh:
+                self.fresh[key] = fresh
+                self.fresh.move_to_end(key)
+                if len(self.fresh) > 4096:
+                    self.fresh.popitem(last=False)
+            else:
+                self.fresh.pop(key, None)
+
+    def fresh_until(self, name: str, params: Dict) -> Optional[float]:
+        """
+        Unix time until which the last response of API method `name` with
+
+        `params` is fresh according to its cache headers, that is when the
+
+        server is expected to refresh it. `None` if unknown.
+        """
+        with self.inflight_lock:
+            return self.fresh.get(ResponseCache.make_key(name, params), None)
+
+    def _join(self, key: Hashable, loop: Optional[AbstractEventLoop] = None) -> Tuple[_Call, bool]:
+        """
+        Returns the in-flight call `key`, counting the caller among its
+
+        waiters, and whether the caller created it and thus has to perform
+
+        the call. `loop` is the event loop the caller performs the call on if
+
+        it creates it, `None` for a blocking call.
+        """
+        with self.inflight_lock:
+            call = self.inflight.get(key, None)
+            if call is not None:
+                call.waiters += 1
+                return call, False
+            call = self.inflight[key] = _Call(loop)
+            return call, True
+
+    def _leave(self, call: _Call) -> bool:
+        """
+        Stop waiting for `call`. Returns whether it has no waiters left.
+        """
+        with self.inflight_lock:
+            call.waiters -= 1
+            return call.waiters == 0
+
+    def _settle(self, key: Hashable, future: Future, ret: Any, error: Optional[BaseException]):
+        with self.inflight_lock:
+            del self.inflight[key]
+        if error is None:
+            future.set_result(ret)
         else:
-            raise IllegalArgumentError(ret['cause'])
+            future.set_exception(error)
+
+    def call(
+        self, name: str, params: Dict, *, limited: bool = True,
+        shared: bool = True) -> Dict[str, Any]:
+        """
+        Call API method `name` with query parameters `params`, going through
+
+        the response cache if there is one. If `shared` is `False`, the call
+
+        always sends its own request, e.g. to hedge a slow identical call.
+        """
+        key = ResponseCache.make_key(name, params)
+        ret = self.cache.get(key) if self.cache and shared else None
+        if ret is not None:
+            return ret
+        if not shared:
+            return self.decode(
+                self.get(root_URL + name + arg_parser(**params), limited=limited)
+            )
+        call, owner = self._join(key)
+        if not owner:
+            loop = call.loop
+            try:
+                # waiting on the thread of the event loop which has to settle
+                # the call would block it, and a stopped loop never settles it
+                if loop is None or (loop.is_running() and loop is not _running_loop()):
+                    return call.future.result()
+            finally:
+                self._leave(call)
+            return self.decode(
+                self.get(root_URL + name + arg_parser(**params), limited=limited)
+            )
+        ret, error = None, None
+        try:
+            response = self.get(root_URL + name + arg_parser(**params), limited=limited)
+            ret = self.decode(response)
+            self._remember(key, response)
+            if self.cache:
+                self.cache.put(key, response, ret)
+            return ret
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._settle(key, call.future, ret, error)
+
+    async def async_call(
+        self, name: str, params: Dict, *, limited: bool = True,
+        shared: bool = True) -> Dict[str, Any]:
+        from asyncio import Task, get_running_loop, shield, wait, wrap_future
+
+        key = ResponseCache.make_key(name, params)
+        ret = self.cache.get(key) if self.cache and shared else None
+        if ret is not None:
+            return ret
+        if not shared:
+            return self.decode(await self.async_get(
+                root_URL + name + arg_parser(**params), limited=limited
+            ))
+        call, owner = self._join(key, get_running_loop())
+        if owner:
+            # no caller owns the request, so cancelling one leaves the others
+            call.task = Task(self._async_fetch(key, call.future, name, params, limited))
+            self.background.add(call.task)
+            call.task.add_done_callback(self.background.discard)
+        try:
+            return await shield(wrap_future(call.future))
+        finally:
+            if self._leave(call) and call.task is not None and not call.task.done():
+                # the last waiter is gone, e.g. a generator closed early:
+                # cancel the request rather than leave it pending on a loop
+                # which may never run again
+                call.task.cancel()
+                await wait((call.task,))
+
+    async def _async_fetch(
+        self, key: Hashable, future: Future, name: str, params: Dict, limited: bool):
+        from asyncio import CancelledError
+
+        ret, error = None, None
+        try:
+            response = await self.async_get(
+                root_URL + name + arg_parser(**params), limited=limited
+            )
+            ret = self.decode(response)
+            self._remember(key, response)
+            if self.cache:
+                self.cache.put(key, response, ret)
+        except CancelledError:
+            # every waiter was cancelled, or the event loop shuts down
+            error = RuntimeError("shared call to %s was cancelled" % (name,))
+            raise
+        except BaseException as e:
+            error = e
+        finally:
+            self._settle(key, future, ret, error)
+
+
+def _running_loop() -> Optional[AbstractEventLoop]:
+    """
+    Returns the event loop running in the current thread, if any.
+    """
+    asyncio = modules.get("asyncio", None)
+    if asyncio is None:
+        # never imported, so no loop can be running
+        return None
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+_client: Optional[Client] = None
+
+def get_client() -> Client:
+    """
+    Returns the client used by API methods called without a `client` argument.
+    """
+    global _client
+    if _client is None:
+        _client = Client()
+    return _client
+
+def set_client(client: Client):
+    """
+    Replace the default client, e.g. to change pool size or timeouts.
+    """
+    global _client
+    _client = client
+
+def set_concurrency(limit: int):
+    """
+    Set the maximum number of requests the `async_*` methods keep in flight.
+
+    The default client is replaced by one with a pool of `limit` connections
+
+    and otherwise the same settings, and closed.
+    """
+    old = _client
+    if old is None:
+        set_client(Client(pool_size=limit))
+        return
+    client = Client(
+        pool_size=limit, timeout=old.timeout, cache=old.cache, decoder=old.decoder,
+        retries=old.retries, backoff=old.backoff
+    )
+    # set after creation, as `None` disables rate limiting
+    client.limiter = old.limiter
+    client.fresh = old.fresh
+    set_client(client)
+    old.close()
+
+def _make_api(name: str, doc: Optional[str]) -> Callable:
+    def ret(*, client: Optional[Client] = None, **kwargs):
+        api_name = name
+        client = client if client else get_client()
+        return client.call(api_name, kwargs, limited='key' in kwargs)
 
-    ret.__doc__ = e.__doc__
+    ret.__name__ = ret.__qualname__ = name.replace("/", "_")
+    ret.__doc__ = doc
     api_content[name] = ret
+    return ret
+
+def _make_asyncapi(name: str, doc: Optional[str]) -> Callable:
+    async def ret(*, client: Optional[Client] = None, **kwargs):
+        api_name = name
+        client = client if client else get_client()
+        return await client.async_call(api_name, kwargs, limited='key' in kwargs)
+
+    ret.__name__ = ret.__qualname__ = "async_" + name.replace("/", "_")
+    ret.__doc__ = doc
+    asyncapi_content[name] = ret
+    return ret
+
+def api(e: Callable) -> Callable:
+    """
+    Decorator for Hypixel API methods.
+
+    The generated method accepts an optional `client` keyword argument, which
+
+    defaults to `get_client()`.
+    """
+    
+    name = e()
+    ret = _make_api(name, e.__doc__)
     interfaces.append(name.replace("/", "_"))
     return ret
 
 
 async def get_wrapper(url, params = None, **kwargs):
-    return requests.get(url, params, **kwargs)
+    """
+    Non-blocking GET request through the default client.
+    """
+    return await get_client().async_get(url, params, **kwargs)
 
 def asyncapi(e: Callable) -> Callable:
     """
@@ -50,84 +984,94 @@ def asyncapi(e: Callable) -> Callable:
     """
 
     name = e()
-    async def ret(**kwargs):
-        api_name = name
-        resp = json.loads((
-            await get_wrapper(root_URL + api_name + arg_parser(**kwargs))).content
-        )
-        if resp['success']:
-            return resp
-        else:
-            raise IllegalArgumentError(resp['cause'])
-
-    asyncapi_content[name] = ret
+    ret = _make_asyncapi(name, e.__doc__)
     interfaces.append("async_" + name.replace("/", "_"))
     return ret
 
 
-@api
-def watchdogstats():
+def endpoint(name: str) -> Callable:
     """
-    Returns some statistics about Watchdog & bans.
-
-    Parameters: `key`
-
-    Example Response:
-
-    ```json
-    {
-        'success': True,
-        'watchdog_lastMinute': 2,
-        'staff_rollingDaily': 3227,
-        'watchdog_total': 6315204,
-        'watchdog_rollingDaily': 6534,
-        'staff_total': 2227861
-    }
-    ```
+    Returns the API method `name` declared in `endpoints`, e.g. `player`,
 
-    https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/watchdogstats.md
+    `async_player` or `skyblock/profiles`, creating it on first use.
     """
-    return "watchdogstats"
-@asyncapi
-def async_watchdogstats():
-    return "watchdogstats"
+    asynchronous = name.startswith("async_")
+    path = _paths.get(name[6:] if asynchronous else name, None)
+    if path is None:
+        raise AttributeError("Unknown API method %s" % (name,))
+    contents = asyncapi_content if asynchronous else api_content
+    if path not in contents:
+        method = (_make_asyncapi if asynchronous else _make_api)(path, _docs[path])
+        globals()[method.__name__] = method
+    return contents[path]
+
+def __getattr__(name: str) -> Callable:
+    return endpoint(name)
+
+
+async def async_fetch_many(
+    name: str, values: Iterable, *, param: str = "uuid",
+    client: Optional[Client] = None, return_exceptions: bool = False,
+    **kwargs) -> AsyncIterator[Tuple[Any, Any]]:
+    """
+    Call API method `name` (e.g. `player` or `skyblock_profiles`) once for
 
+    every distinct value in `values`, passed as parameter `param` along with
 
-@api
-def status():
-    """
-    Returns online status information for given player, including game, mode and
-    
-    map when available. Players can disable this endpoint via in-game settings.
-    
-    When done so the API will return as if the player is offline.
+    `kwargs`. The calls run concurrently, and `(value, response)` tuples are
 
-    Parameters: `key`, `uuid`
+    yielded as they complete. Calls already in flight elsewhere are shared.
 
-    Example Response:
+    If `return_exceptions` is `True`, a failed call yields its exception as
 
-    ```json
-    {
-        'success': True,
-        'session': {
-            'online': True,
-            'gameType': 'SKYBLOCK',
-            'mode': 'hub'
-        }
+    the response instead of raising it.
+    """
+    from asyncio import FIRST_COMPLETED, Task, wait
+
+    try:
+        method = endpoint("async_" + name)
+    except AttributeError:
+        raise ValueError("Unknown API method %s" % (name,))
+    pending: Dict[Task, Any] = {
+        Task(method(client=client, **{param: value}, **kwargs)): value
+        for value in dict.fromkeys(values)
     }
-    ```
-
-    https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/status.md
+    try:
+        while pending:
+            done, _ = await wait(pending, return_when=FIRST_COMPLETED)
+            for task in done:
+                value = pending.pop(task)
+                if task.exception() is not None and return_exceptions:
+                    yield value, task.exception()
+                else:
+                    yield value, task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            # let the shared requests left without waiters be cancelled too
+            await wait(pending)
+
+
+def fetch_many(name: str, values: Iterable, **kwargs) -> Iterator[Tuple[Any, Any]]:
     """
-    return "status"
-
+    Synchronous version of `async_fetch_many()`.
+    """
+    from asyncio import get_event_loop
 
-@asyncapi
-def async_status():
-    return "status"
+    loop = get_event_loop()
+    responses = async_fetch_many(name, values, **kwargs)
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(responses.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.run_until_complete(responses.aclose())
 
 
-def resources(**kwargs):
+def resources(*, client: Optional[Client] = None, **kwargs):
     """
     Provides an endpoint to retrieve resources which don't change often. This
     
@@ -173,17 +1117,59 @@ def resources(**kwargs):
     https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/resources.md
     """
     api_name = "resources"
-    ret = json.loads(requests.get(
-    root_URL + api_name + "/" + kwargs['resource']).content)
-    if ret['success']:
-        return ret
-    else:
-        raise IllegalArgumentError(ret['cause'])
+    client = client if client else get_client()
+    return client.call(api_name + "/" + kwargs.pop('resource'), kwargs, limited=False)
 
 
-@api
-def recentgames():
-    """
+# `(path, docstring)` of every API method. The method is named after the path,
+# with slashes replaced by underscores, and prefixed with `async_` for the
+# coroutine version. Methods are created by `endpoint()` on first access.
+endpoints: Tuple[Tuple[str, str], ...] = (
+    ("watchdogstats", """
+    Returns some statistics about Watchdog & bans.
+
+    Parameters: `key`
+
+    Example Response:
+
+    ```json
+    {
+        'success': True,
+        'watchdog_lastMinute': 2,
+        'staff_rollingDaily': 3227,
+        'watchdog_total': 6315204,
+        'watchdog_rollingDaily': 6534,
+        'staff_total': 2227861
+    }
+    ```
+
+    https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/watchdogstats.md
+    """),
+    ("status", """
+    Returns online status information for given player, including game, mode and
+    
+    map when available. Players can disable this endpoint via in-game settings.
+    
+    When done so the API will return as if the player is offline.
+
+    Parameters: `key`, `uuid`
+
+    Example Response:
+
+    ```json
+    {
+        'success': True,
+        'session': {
+            'online': True,
+            'gameType': 'SKYBLOCK',
+            'mode': 'hub'
+        }
+    }
+    ```
+
+    https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/status.md
+    """),
+    ("recentgames", """
     Returns recent games of a player. A maximum of 100 games are returned and
     
     recent games are only stored for up to 3 days at this time. Players can
@@ -213,17 +1199,8 @@ def recentgames():
 
     https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/recentGames.md
     ```
-    """
-    return "recentgames"
-
-
-@asyncapi
-def async_recentgames():
-    return "recentgames"
-
-@api
-def playercount():
-    """
+    """),
+    ("playercount", """
     Returns current player count.
 
     This is also now included in the gameCounts method.
@@ -240,17 +1217,8 @@ def playercount():
     ```
 
     https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/playerCount.md
-    """
-    return "playercount"
-
-
-@asyncapi
-def async_playercount():
-    return "playercount"
-
-@api
-def player():
-    """
+    """),
+    ("player", """
     Returns a player's data, such as game stats.
 
     Parameters: `key`, `uuid`
@@ -287,17 +1255,8 @@ def player():
     ```
 
     https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/player.md
-    """
-    return "player"
-
-
-@asyncapi
-def async_player():
-    return "player"
-
-@api
-def leaderboards():
-    """
+    """),
+    ("leaderboards", """
     Returns a list of the official leaderboards and their current standings for
     
     games on the network.
@@ -329,17 +1288,8 @@ def leaderboards():
     ```
 
     https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/leaderboards.md
-    """
-    return "leaderboards"
-
-
-@asyncapi
-def async_leaderboards():
-    return "leaderboards"
-
-@api
-def key():
-    """
+    """),
+    ("key", """
     Returns information regarding given key.
 
     Parameters: `key`
@@ -360,17 +1310,8 @@ def key():
     ```
 
     https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/key.md
-    """
-    return "key"
-
-
-@asyncapi
-def async_key():
-    return "key"
-
-@api
-def guild():
-    """
+    """),
+    ("guild", """
     Returns information about given guild. For a JSON list of Guild achievements
     
     and a JSON list of Guild permissions, please refer to `resources()` method
@@ -380,17 +1321,8 @@ def guild():
     A detailed explanation of each field can be found at
     
     https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/guild.md
-    """
-    return "guild"
-
-
-@asyncapi
-def async_guild():
-    return "guild"
-
-@api
-def gamecounts():
-    """
+    """),
+    ("gamecounts", """
     Returns the current player count along with the player count of each public
 
     game + mode on the server. Due to the large amount of modes and that they
@@ -423,17 +1355,8 @@ def gamecounts():
     ```
 
     https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/gameCounts.md
-    """
-    return "gamecounts"
-
-
-@asyncapi
-def async_gamecounts():
-    return "gamecounts"
-
-@api
-def friends():
-    """
+    """),
+    ("friends", """
     Returns friendships for given player.
 
     Parameters: `key`, `uuid`
@@ -456,17 +1379,8 @@ def friends():
     ```
 
     https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/friends.md
-    """
-    return "friends"
-
-
-@asyncapi
-def async_friends():
-    return "friends"
-
-@api
-def findguild():
-    """
+    """),
+    ("findguild", """
     Returns the id of the requested guild.
 
     Parameters: `key`, `byName`, `byUuid`
@@ -481,17 +1395,8 @@ def findguild():
     ```
 
     https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/findGuild.md
-    """
-    return "findguild"
-
-
-@asyncapi
-def async_findguild():
-    return "findguild"
-
-@api
-def boosters():
-    """
+    """),
+    ("boosters", """
     Returns list of boosters.
 
     Parameters: `key`
@@ -533,17 +1438,8 @@ def boosters():
     ```
 
     https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/boosters.md
-    """
-    return "boosters"
-
-
-@asyncapi
-def async_boosters():
-    return "boosters"
-
-@api
-def skyblock_auction():
-    """
+    """),
+    ("skyblock/auction", """
     Returns SkyBlock auctions by either player, profile or auction uuid. Only
     
     "active" auctions are returned, these are auctions that are still open or
@@ -598,17 +1494,8 @@ def skyblock_auction():
     ```
 
     https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/skyblock/auction.md
-    """
-    return "skyblock/auction"
-
-
-@asyncapi
-def async_skyblock_auction():
-    return "skyblock/auction"
-
-@api
-def skyblock_auctions():
-    """
+    """),
+    ("skyblock/auctions", """
     Returns SkyBlock auctions that are currently active in the in-game Auction
     
     House. This method uses pagination due to the amount of results returned.
@@ -633,17 +1520,8 @@ def skyblock_auctions():
     ```
 
     https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/skyblock/auctions.md
-    """
-    return "skyblock/auctions"
-
-
-@asyncapi
-def async_skyblock_auctions():
-    return "skyblock/auctions"
-
-@api
-def skyblock_auctions_ended():
-    """
+    """),
+    ("skyblock/auctions_ended", """
     Returns SkyBlock auctions which ended in the last 60 seconds (More precisely,
     
     whatever time is defined in the "Cache-Control" header of the response).
@@ -673,17 +1551,8 @@ def skyblock_auctions_ended():
     ```
 
     https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/skyblock/auctions_ended.md
-    """
-    return "skyblock/auctions_ended"
-
-
-@asyncapi
-def async_skyblock_auctions_ended():
-    return "skyblock/auctions_ended"
-
-@api
-def skyblock_bazaar():
-    """
+    """),
+    ("skyblock/bazaar", """
     Returns the list of products along with their sell summary, buy summary and
     
     quick status.
@@ -724,17 +1593,8 @@ def skyblock_bazaar():
     ```
 
     https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/skyblock/bazaar.md
-    """
-    return "skyblock/bazaar"
-
-
-@asyncapi
-def async_skyblock_bazaar():
-    return "skyblock/bazaar"
-
-@api
-def skyblock_news():
-    """
+    """),
+    ("skyblock/news", """
     Returns SkyBlock news, including a title, description and a thread.
 
     Parameters: `key`
@@ -757,17 +1617,8 @@ def skyblock_news():
     ```
 
     https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/skyblock/news.md
-    """
-    return "skyblock/news"
-
-
-@asyncapi
-def async_skyblock_news():
-    return "skyblock/news"
-
-@api
-def skyblock_profile():
-    """
+    """),
+    ("skyblock/profile", """
     Returns a SkyBlock profile's data, such as stats, objectives etc. The data
     
     returned can differ depending on the players in-game API settings.
@@ -775,17 +1626,8 @@ def skyblock_profile():
     Parameters: `key`, `profile`
 
     https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/skyblock/profile.md
-    """
-    return "skyblock/profile"
-
-
-@asyncapi
-def async_skyblock_profile():
-    return "skyblock/profile"
-
-@api
-def skyblock_profiles():
-    """
+    """),
+    ("skyblock/profiles", """
     Returns an array SkyBlock profile's data, such as stats, objectives etc.
     
     The data returned can differ depending on the players in-game API settings.
@@ -795,12 +1637,15 @@ def skyblock_profiles():
     Parameters: `key`, `uuid`
 
     https://github.com/HypixelDev/PublicAPI/blob/master/Documentation/methods/skyblock/profiles.md
-    """
-    return "skyblock/profiles"
-
-
-@asyncapi
-def async_skyblock_profiles():
-    return "skyblock/profiles"
-
-__all__ = interfaces.copy()
+    """),
+)
+_docs: Dict[str, str] = dict(endpoints)
+_paths: Dict[str, str] = {}
+for _ in _docs:
+    _paths[_] = _paths[_.replace("/", "_")] = _
+    interfaces += [_.replace("/", "_"), "async_" + _.replace("/", "_")]
+
+__all__ = interfaces.copy() + [
+    "Client", "RateLimiter", "RefreshClock", "ResponseCache", "endpoint", "get_client", "get_decoder",
+    "set_client", "set_concurrency", "fetch_many", "async_fetch_many"
+]
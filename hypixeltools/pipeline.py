@@ -0,0 +1,141 @@
+from asyncio import Condition, Task, gather, get_event_loop
+from collections import deque
+from concurrent.futures import Executor
+from inspect import iscoroutinefunction
+from typing import Any, Awaitable, Callable, Deque, Optional
+
+
+class Channel():
+    """
+    Bounded queue connecting two stages of an asynchronous pipeline.
+
+    When the consumer falls behind and `size` items are waiting, `put()`
+
+    follows `policy`:
+
+    * `block`: wait for room, slowing the producer down (backpressure)
+    * `drop`: discard the new item
+    * `coalesce`: replace the newest waiting item with `merge(old, new)`,
+
+      or with the new item if `merge` is not given
+
+    Iterating over a channel yields its items until it is closed and empty.
+
+    `dropped` and `coalesced` count the items affected by the policy.
+    """
+
+    policies = ('block', 'drop', 'coalesce')
+
+    def __init__(
+        self, size: int = 1, policy: str = 'block',
+        merge: Optional[Callable[[Any, Any], Any]] = None):
+        if policy not in self.policies:
+            raise ValueError(
+                "Channel policy should be one of %s, got %s" % (self.policies, policy)
+            )
+        if size < 1:
+            raise ValueError("Channel size should be positive, got %d" % (size,))
+        self.size = size
+        self.policy = policy
+        self.merge = merge
+        self.closed = False
+        self.dropped = 0
+        self.coalesced = 0
+        self.items: Deque[Any] = deque()
+        self._condition: Optional[Condition] = None
+
+    @property
+    def condition(self) -> Condition:
+        # created on first use, inside the event loop running the pipeline
+        if self._condition is None:
+            self._condition = Condition()
+        return self._condition
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    async def put(self, item: Any) -> bool:
+        """
+        Send `item`, returning whether it was queued, possibly coalesced.
+        """
+        async with self.condition:
+            if self.closed:
+                raise ValueError("put() on a closed channel")
+            while len(self.items) >= self.size:
+                if self.policy == 'drop':
+                    self.dropped += 1
+                    return False
+                if self.policy == 'coalesce':
+                    last = self.items.pop()
+                    item = self.merge(last, item) if self.merge else item
+                    self.coalesced += 1
+                    break
+                await self.condition.wait()
+            self.items.append(item)
+            self.condition.notify_all()
+            return True
+
+    async def get(self) -> Any:
+        """
+        Receive the oldest item, raising `StopAsyncIteration` once the
+
+        channel is closed and empty.
+        """
+        async with self.condition:
+            while not self.items:
+                if self.closed:
+                    raise StopAsyncIteration
+                await self.condition.wait()
+            item = self.items.popleft()
+            self.condition.notify_all()
+            return item
+
+    async def close(self):
+        """
+        Stop accepting items. Consumers still receive the waiting ones.
+        """
+        async with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def __aiter__(self) -> "Channel":
+        return self
+
+    async def __anext__(self) -> Any:
+        return await self.get()
+
+
+async def runStages(*stages: Awaitable):
+    """
+    Run the coroutines of a pipeline concurrently until they all finish.
+
+    If one of them raises, the others are cancelled and the error propagates.
+    """
+    tasks = [Task(_) for _ in stages]
+    try:
+        await gather(*tasks)
+    finally:
+        for _ in tasks:
+            _.cancel()
+
+
+async def callProcessor(
+    processor: Callable, *args: Any, offload: bool = False,
+    executor: Optional[Executor] = None) -> Any:
+    """
+    Call `processor` with `args`. Coroutine functions are awaited; other
+
+    functions run on the event loop, or on `executor` (the default executor
+
+    of the loop if `None`) if `offload` is set, so that slow processors do not
+
+    block the loop.
+    """
+    if iscoroutinefunction(processor):
+        return await processor(*args)
+    if offload:
+        return await get_event_loop().run_in_executor(executor, processor, *args)
+    return processor(*args)
+
+
+__all__ = ['Channel', 'runStages', 'callProcessor']
@@ -0,0 +1,312 @@
+from json import dumps
+from mmap import ACCESS_READ, mmap
+from operator import itemgetter
+from struct import Struct
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+from .auction import AuctionOrder, AuctionSnapshot
+from .network import get_decoder
+from .table import AuctionTable
+
+_magic = b"HTSNAP\x00\x01"
+_header = Struct("<8sqqq")
+
+_integers = ('start', 'end', 'starting_bid', 'highest_bid_amount', 'timestamp', 'price')
+_flags = ('bin', 'claimed')
+_strings = (
+    'item_name', 'tier', 'category', 'extra', 'item_lore', 'item_bytes',
+    'auctioneer', 'profile_id', 'seller', 'seller_profile', 'buyer'
+)
+_fixed = _integers + _flags + _strings
+_keyFields = (None, 'uuid', 'auction_id')
+
+# Column layout, in file order. `present` has bit `i` set when field
+# `_fixed[i]` is stored in its column; other fields go to `rest` as JSON.
+_schema = (
+    (('key_hi', '<u8'), ('key_lo', '<u8'), ('present', '<u4'), ('rest', '<u4'))
+    + tuple((_, '<i8') for _ in _integers)
+    + tuple((_, '<u4') for _ in _strings)
+    + tuple((_, '<u1') for _ in _flags)
+    + (('key_field', '<u1'),)
+)
+
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _layout(count: int, start: int) -> Dict[str, int]:
+    ret = {}
+    offset = start
+    for name, dtype in _schema:
+        offset = _aligned(offset)
+        ret[name] = offset
+        offset += np.dtype(dtype).itemsize * count
+    ret[''] = _aligned(offset)
+    return ret
+
+
+def _key(fields: Dict[str, Any]) -> int:
+    for name in _keyFields[1:]:
+        value = fields.get(name, None)
+        if value:
+            try:
+                return int(value.replace('-', ''), 16)
+            except (AttributeError, ValueError):
+                return 0
+    return 0
+
+
+def writeSnapshot(
+    path: str, auctions: Iterable[Union[AuctionOrder, Dict]],
+    lastUpdated: Optional[int] = None) -> int:
+    """
+    Write `auctions`, `AuctionOrder` objects or auction `dict` objects as
+
+    returned by the API, to a binary snapshot at `path`. Returns the number
+
+    of auctions written.
+
+    The file holds a header, one fixed-width column per common field, and a
+
+    table of the distinct strings referenced by the columns. Nested fields
+
+    such as `bids` are stored as JSON strings in the same table.
+    """
+    strings: Dict[str, int] = {'': 0}
+    columns: Dict[str, Any] = {}
+    records = []
+    for auction in auctions:
+        if isinstance(auction, AuctionOrder):
+            # the raw lore, as cleaning it is left to the loaded objects
+            record = auction.toDict()
+            if hasattr(auction, '_item_lore'):
+                record['item_lore'] = auction._item_lore
+        else:
+            record = dict(auction)
+        records.append(record)
+    keys = [_key(_) for _ in records]
+    columns['key_hi'] = [_ >> 64 for _ in keys]
+    columns['key_lo'] = [_ & 0xffffffffffffffff for _ in keys]
+    keyFields = []
+    for key, record in zip(keys, records):
+        canonical = "%032x" % (key,) if key else None
+        for i, name in enumerate(_keyFields[1:], 1):
+            # keys are stored as integers, so only canonical UUIDs are dropped
+            if canonical and record.get(name, None) == canonical:
+                del record[name]
+                keyFields.append(i)
+                break
+        else:
+            keyFields.append(0)
+    columns['key_field'] = keyFields
+    present = np.zeros(len(records), dtype='<u4')
+    stored = frozenset(_fixed)
+    unstored: List[Dict[str, Any]] = [{} for _ in records]
+    for i, name in enumerate(_fixed):
+        kind = bool if name in _flags else str if name in _strings else int
+        values = [_.get(name, None) for _ in records]
+        valid = [type(_) is kind for _ in values]
+        present |= np.array(valid, dtype='<u4') << i
+        for record, extra, value, ok in zip(records, unstored, values, valid):
+            if not ok and name in record:
+                extra[name] = value
+        if kind is str:
+            values = [
+                strings.setdefault(value, len(strings)) if ok else 0
+                for value, ok in zip(values, valid)
+            ]
+        else:
+            values = [value if ok else 0 for value, ok in zip(values, valid)]
+        columns[name] = values
+    columns['present'] = present
+    rests = []
+    for record, extra in zip(records, unstored):
+        rest = {k: v for k, v in record.items() if k not in stored}
+        rest.update(extra)
+        rest = dumps(rest, separators=(',', ':'), default=list) if rest else ''
+        rests.append(strings.setdefault(rest, len(strings)))
+    columns['rest'] = rests
+    count = len(columns['present'])
+    layout = _layout(count, _header.size)
+    encoded = [_.encode('utf-8', 'surrogatepass') for _ in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u8')
+    np.cumsum([len(_) for _ in encoded], out=offsets[1:])
+    with open(path, 'wb') as file:
+        file.write(_header.pack(_magic, count, len(encoded), lastUpdated or 0))
+        for name, dtype in _schema:
+            file.write(b'\0' * (layout[name] - file.tell()))
+            file.write(np.array(columns[name], dtype=dtype).tobytes())
+        file.write(b'\0' * (layout[''] - file.tell()))
+        file.write(offsets.tobytes())
+        file.write(b''.join(encoded))
+    return count
+
+
+class SnapshotFile():
+    """
+    Binary snapshot opened through a read-only memory map. Opening reads
+
+    only the header: `columns` are NumPy arrays viewing the mapped file, and
+
+    strings are decoded on first use.
+
+    ```python
+    writeSnapshot('ah.snap', loadAuctionPages(key), lastUpdated)
+    with openSnapshot('ah.snap') as snapshot:
+        table = snapshot.toTable()
+        auctions = snapshot.toSnapshot()
+    ```
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as file:
+            self._map = mmap(file.fileno(), 0, access=ACCESS_READ)
+        magic, count, strings, lastUpdated = _header.unpack_from(self._map, 0)
+        if magic != _magic:
+            self._map.close()
+            raise ValueError("%s is not an auction snapshot" % (path,))
+        self.lastUpdated: Optional[int] = lastUpdated or None
+        layout = _layout(count, _header.size)
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.frombuffer(self._map, dtype, count, layout[name])
+            for name, dtype in _schema
+        }
+        self._offsets = np.frombuffer(self._map, '<u8', strings + 1, layout[''])
+        self._base = layout[''] + self._offsets.nbytes
+        self._strings: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.columns['present'])
+
+    def __repr__(self) -> str:
+        return "<SnapshotFile of %d auctions>" % (len(self),)
+
+    def __enter__(self) -> "SnapshotFile":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Release the memory map. If arrays viewing it are still referenced,
+
+        e.g. by a table from `toTable()`, it is released with them instead.
+        """
+        self.columns = {}
+        self._offsets = None
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+
+    def string(self, index: int) -> str:
+        """
+        Returns string `index` of the string table.
+        """
+        return self.strings((index,))[index]
+
+    def strings(self, indices: Iterable[int]) -> Dict[int, str]:
+        """
+        Returns strings `indices` of the string table, as a `dict`.
+        """
+        indices = list(indices)
+        self._decode(indices)
+        return {_: self._strings[_] for _ in indices}
+
+    def _decode(self, indices: Iterable[int]):
+        cache = self._strings
+        missing = np.fromiter((_ for _ in indices if _ not in cache), dtype=np.int64)
+        if len(missing):
+            base = self._base
+            data = self._map
+            for index, begin, end in zip(
+                missing.tolist(), self._offsets[missing].tolist(),
+                self._offsets[missing + 1].tolist()):
+                cache[index] = data[base + begin:base + end].decode('utf-8', 'surrogatepass')
+
+    def __getitem__(self, index: int) -> AuctionOrder:
+        if not -len(self) <= index < len(self):
+            raise IndexError("snapshot index out of range")
+        index %= len(self)
+        return next(self._rows(slice(index, index + 1)))
+
+    def __iter__(self) -> Iterator[AuctionOrder]:
+        return self._rows(slice(None))
+
+    def _column(self, name: str, index: slice) -> List[Any]:
+        column = self.columns[name][index]
+        if name in _flags:
+            return column.view(np.bool_).tolist()
+        if name in _strings or name == 'rest':
+            refs = column.tolist()
+            self._decode(set(refs))
+            lookup = self._strings
+            return [lookup[_] for _ in refs]
+        return column.tolist()
+
+    def _rows(self, index: slice) -> Iterator[AuctionOrder]:
+        values = list(zip(*(self._column(_, index) for _ in _fixed)))
+        keys = zip(*(self.columns[_][index].tolist() for _ in ('key_hi', 'key_lo', 'key_field')))
+        present = self.columns['present'][index].tolist()
+        rests = self._column('rest', index)
+        loads = get_decoder()
+        loaded: Dict[str, Dict[str, Any]] = {}
+        # rows share a few distinct masks, each selecting a fixed set of fields
+        selectors = {}
+        for row, mask, (hi, lo, keyField), rest in zip(values, present, keys, rests):
+            if mask not in selectors:
+                fields = [i for i in range(len(_fixed)) if mask & (1 << i)]
+                if len(fields) > 1:
+                    select = itemgetter(*fields)
+                else:
+                    select = lambda row, fields=fields: [row[_] for _ in fields]
+                selectors[mask] = tuple(_fixed[i] for i in fields), select
+            names, select = selectors[mask]
+            kwargs = dict(zip(names, select(row)))
+            if keyField:
+                kwargs[_keyFields[keyField]] = "%016x%016x" % (hi, lo)
+            if rest:
+                if rest not in loaded:
+                    loaded[rest] = loads(rest)
+                kwargs.update(loaded[rest])
+            yield AuctionOrder(**kwargs)
+
+    def toSnapshot(self) -> AuctionSnapshot:
+        """
+        Load all the auctions into an `AuctionSnapshot`.
+        """
+        return AuctionSnapshot(self)
+
+    def toTable(self) -> AuctionTable:
+        """
+        Build an `AuctionTable` from the columns. Numeric columns are views of
+
+        the mapped file; categorical ones are recoded to dense codes.
+        """
+        columns = {_: self.columns[_] for _ in AuctionTable.numeric}
+        columns.update({_: self.columns[_].view(np.bool_) for _ in AuctionTable.flags})
+        categories = {}
+        for _ in AuctionTable.categorical:
+            refs, codes = np.unique(self.columns[_], return_inverse=True)
+            columns[_] = codes.astype(np.int32)
+            categories[_] = [self.string(i) for i in refs.tolist()]
+        uuid = np.array([
+            "%016x%016x" % (hi, lo) if field == 1 else None for hi, lo, field in zip(
+                self.columns['key_hi'].tolist(), self.columns['key_lo'].tolist(),
+                self.columns['key_field'].tolist())
+        ], dtype=object)
+        return AuctionTable(columns, categories, uuid)
+
+
+def openSnapshot(path: str) -> SnapshotFile:
+    """
+    Open a snapshot written by `writeSnapshot()`.
+    """
+    return SnapshotFile(path)
+
+
+__all__ = ['SnapshotFile', 'openSnapshot', 'writeSnapshot']
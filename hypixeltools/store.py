@@ -0,0 +1,419 @@
+from bisect import bisect_left, insort
+from time import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from .auction import AuctionDiff, AuctionOrder, AuctionSnapshot
+
+
+def auctionPrice(o: AuctionOrder) -> int:
+    """
+    The highest bid of `o`, or its starting bid if it has no bids.
+    """
+    return getattr(o, 'highest_bid_amount', 0) or getattr(o, 'starting_bid', 0)
+
+
+# additions at once above which sorted indexes are rebuilt by a single sort
+# rather than updated by one insertion each
+bulk = 256
+
+
+class PriceLadder():
+    """
+    Price ladder of the open auctions of each item, updated incrementally.
+
+    Auctions are grouped by `by`, a field name or a function of the auction,
+
+    and kept sorted by price within each group, so that the lowest price of
+
+    an item is read in constant time and an update costs in proportion to the
+
+    auctions which changed. Only open BIN auctions, neither bought nor
+
+    claimed, are kept if `bin`.
+
+    ```python
+    ladder = PriceLadder()
+    ladder.sync(snapshot)
+    ladder.lowestPrice('Hyperion')
+    ladder.levels('Hyperion', 3)  # [(price, count), ...]
+    ```
+    """
+
+    def __init__(
+        self, auctions: Iterable[AuctionOrder] = (), *,
+        by: Union[str, Callable[[AuctionOrder], Any]] = 'item_name', bin: bool = True):
+        self.by = by
+        self.bin = bin
+        self.snapshot = AuctionSnapshot()
+        self._ladders: Dict[Any, List[Tuple[int, int]]] = {}
+        self._entries: Dict[int, Tuple[Any, int, AuctionOrder]] = {}
+        self.sync(auctions)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, group: Any) -> bool:
+        return group in self._ladders
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._ladders)
+
+    def __repr__(self) -> str:
+        return "<PriceLadder of %d auctions over %d items>" % (
+            len(self), len(self._ladders))
+
+    def accepts(self, o: AuctionOrder) -> bool:
+        """
+        Whether `o` belongs on the ladder.
+        """
+        # a BIN auction with a bid has been bought, even if not claimed yet
+        return not self.bin or (
+            getattr(o, 'bin', False) and not getattr(o, 'claimed', False)
+            and not getattr(o, 'bids', ())
+        )
+
+    def group(self, o: AuctionOrder) -> Any:
+        return self.by(o) if callable(self.by) else getattr(o, self.by, None)
+
+    def add(self, o: AuctionOrder):
+        """
+        Add `o`, replacing the auction with the same key.
+        """
+        self.remove(o)
+        if not self.accepts(o):
+            return None
+        group, price = self.group(o), auctionPrice(o)
+        self._entries[o.key] = group, price, o
+        insort(self._ladders.setdefault(group, []), (price, o.key))
+
+    def extend(self, auctions: Iterable[AuctionOrder]):
+        """
+        Add many auctions at once, replacing those with the same keys. Each
+
+        ladder is extended and sorted once, instead of inserted into once per
+
+        auction.
+        """
+        batch = {_.key: _ for _ in auctions}
+        for o in batch.values():
+            self.remove(o)
+        grouped: Dict[Any, List[Tuple[int, int]]] = {}
+        for o in batch.values():
+            if not self.accepts(o):
+                continue
+            group, price = self.group(o), auctionPrice(o)
+            self._entries[o.key] = group, price, o
+            grouped.setdefault(group, []).append((price, o.key))
+        for group, entries in grouped.items():
+            ladder = self._ladders.setdefault(group, [])
+            ladder.extend(sorted(entries))
+            # two sorted runs, merged in linear time
+            ladder.sort()
+
+    def remove(self, o: AuctionOrder):
+        """
+        Remove the auction with the key of `o`, if present.
+        """
+        entry = self._entries.pop(o.key, None)
+        if entry is None:
+            return None
+        group, price, _ = entry
+        ladder = self._ladders[group]
+        del ladder[bisect_left(ladder, (price, o.key))]
+        if not ladder:
+            del self._ladders[group]
+
+    def apply(self, diff: AuctionDiff):
+        """
+        Update the ladder with the changes of `diff`.
+        """
+        for _ in diff.removed:
+            self.remove(_)
+        for _, new in diff.changed:
+            self.add(new)
+        if len(diff.added) >= bulk:
+            self.extend(diff.added)
+        else:
+            for _ in diff.added:
+                self.add(_)
+
+    def sync(self, auctions: Iterable[AuctionOrder]) -> AuctionDiff:
+        """
+        Make the ladder match `auctions`, a whole auction-house snapshot,
+
+        kept as `snapshot` for the next call. Returns the changes.
+        """
+        if not isinstance(auctions, AuctionSnapshot):
+            auctions = AuctionSnapshot(auctions)
+        diff = auctions.diff(self.snapshot)
+        self.apply(diff)
+        self.snapshot = auctions
+        return diff
+
+    def lowest(self, group: Any) -> Optional[AuctionOrder]:
+        """
+        The cheapest auction of `group`, in constant time.
+        """
+        ladder = self._ladders.get(group, None)
+        return self._entries[ladder[0][1]][2] if ladder else None
+
+    def lowestPrice(self, group: Any) -> Optional[int]:
+        ladder = self._ladders.get(group, None)
+        return ladder[0][0] if ladder else None
+
+    def lowestPrices(self) -> Dict[Any, int]:
+        """
+        The lowest price of every item.
+        """
+        return {group: ladder[0][0] for group, ladder in self._ladders.items()}
+
+    def levels(self, group: Any, depth: int = 5) -> List[Tuple[int, int]]:
+        """
+        The `depth` lowest distinct prices of `group`, with the number of
+
+        auctions at each price.
+        """
+        ret: List[Tuple[int, int]] = []
+        for price, _ in self._ladders.get(group, ()):
+            if ret and ret[-1][0] == price:
+                ret[-1] = price, ret[-1][1] + 1
+            elif len(ret) == depth:
+                break
+            else:
+                ret.append((price, 1))
+        return ret
+
+    def auctions(self, group: Any, depth: Optional[int] = None) -> List[AuctionOrder]:
+        """
+        The auctions of `group` from the cheapest, up to `depth` of them.
+        """
+        ladder = self._ladders.get(group, ())
+        return [self._entries[key][2] for _, key in ladder[:depth]]
+
+
+class AuctionStore():
+    """
+    In-memory auction house with indexes, kept up to date from snapshot diffs.
+
+    `item_name`, `tier` and `category` have hash indexes, looked up in
+
+    constant time, while `end` and `price` have sorted indexes, queried by
+
+    range in logarithmic time. BIN prices of each item are kept in `ladder`,
+
+    a `PriceLadder`.
+
+    ```python
+    store = AuctionStore()
+    async for snapshot in ...:
+        store.sync(snapshot)
+        store.cheapest('Hyperion')
+        store.ending(60)
+        store.query(tier='LEGENDARY', category='weapon', price=(None, 10 ** 6))
+    ```
+    """
+
+    hashed = ('item_name', 'tier', 'category')
+    ordered = ('end', 'price')
+
+    def __init__(self, auctions: Iterable[AuctionOrder] = ()):
+        self.snapshot = AuctionSnapshot()
+        self._hashes: Dict[str, Dict[Any, Set[int]]] = {_: {} for _ in self.hashed}
+        self._ranges: Dict[str, List[Tuple[Any, int]]] = {_: [] for _ in self.ordered}
+        self.ladder = PriceLadder()
+        self.extend(auctions)
+
+    @classmethod
+    def value(cls, o: AuctionOrder, name: str) -> Any:
+        """
+        The value of `o` indexed under `name`.
+        """
+        if name == 'price':
+            return auctionPrice(o)
+        return getattr(o, name, 0 if name in cls.ordered else None)
+
+    def __len__(self) -> int:
+        return len(self.snapshot)
+
+    def __iter__(self) -> Iterator[AuctionOrder]:
+        return iter(self.snapshot.values())
+
+    def __contains__(self, o: AuctionOrder) -> bool:
+        return o.key in self.snapshot
+
+    def __repr__(self) -> str:
+        return "<AuctionStore of %d auctions>" % (len(self),)
+
+    def add(self, o: AuctionOrder):
+        """
+        Add `o` to the store, replacing the auction with the same key.
+        """
+        if o.key in self.snapshot:
+            self.remove(self.snapshot[o.key])
+        self.snapshot[o.key] = o
+        for name, index in self._hashes.items():
+            index.setdefault(self.value(o, name), set()).add(o.key)
+        for name, index in self._ranges.items():
+            insort(index, (self.value(o, name), o.key))
+        self.ladder.add(o)
+
+    def extend(self, auctions: Iterable[AuctionOrder]):
+        """
+        Add many auctions at once, replacing those with the same keys. Each
+
+        sorted index is extended and sorted once, instead of inserted into
+
+        once per auction.
+        """
+        batch = {_.key: _ for _ in auctions}
+        for o in batch.values():
+            if o.key in self.snapshot:
+                self.remove(self.snapshot[o.key])
+        self.snapshot.update(batch)
+        for name, index in self._hashes.items():
+            for o in batch.values():
+                index.setdefault(self.value(o, name), set()).add(o.key)
+        for name, index in self._ranges.items():
+            index.extend(sorted((self.value(o, name), o.key) for o in batch.values()))
+            # two sorted runs, merged in linear time
+            index.sort()
+        self.ladder.extend(batch.values())
+
+    def remove(self, o: AuctionOrder):
+        """
+        Remove the auction with the key of `o` from the store, if present.
+        """
+        o = self.snapshot.pop(o.key, None)
+        if o is None:
+            return None
+        for name, index in self._hashes.items():
+            value = self.value(o, name)
+            keys = index[value]
+            keys.discard(o.key)
+            if not keys:
+                del index[value]
+        for name, index in self._ranges.items():
+            entry = (self.value(o, name), o.key)
+            del index[bisect_left(index, entry)]
+        self.ladder.remove(o)
+
+    def apply(self, diff: AuctionDiff):
+        """
+        Update the store and its indexes with the changes of `diff`.
+        """
+        for _ in diff.removed:
+            self.remove(_)
+        for _, new in diff.changed:
+            self.add(new)
+        if len(diff.added) >= bulk:
+            self.extend(diff.added)
+        else:
+            for _ in diff.added:
+                self.add(_)
+
+    def sync(self, auctions: Iterable[AuctionOrder]) -> AuctionDiff:
+        """
+        Make the store match `auctions`, a whole auction-house snapshot,
+
+        touching only the auctions which changed. Returns the changes.
+        """
+        if not isinstance(auctions, AuctionSnapshot):
+            auctions = AuctionSnapshot(auctions)
+        diff = auctions.diff(self.snapshot)
+        self.apply(diff)
+        return diff
+
+    def get(self, key: int) -> Optional[AuctionOrder]:
+        return self.snapshot.get(key, None)
+
+    def lookup(self, name: str, value: Any) -> List[AuctionOrder]:
+        """
+        Auctions whose hashed field `name` equals `value`.
+        """
+        return [self.snapshot[_] for _ in self._hashes[name].get(value, ())]
+
+    def _bounds(self, name: str, low: Any, high: Any) -> Tuple[int, int]:
+        index = self._ranges[name]
+        return (
+            0 if low is None else bisect_left(index, (low,)),
+            len(index) if high is None else bisect_left(index, (high,))
+        )
+
+    def _range(self, name: str, low: Any, high: Any) -> Iterator[int]:
+        index = self._ranges[name]
+        return (index[i][1] for i in range(*self._bounds(name, low, high)))
+
+    def range(self, name: str, low: Any = None, high: Any = None) -> Iterator[AuctionOrder]:
+        """
+        Auctions with `low <= value < high` for sorted field `name`, in
+
+        increasing order. `None` leaves the bound open.
+        """
+        return (self.snapshot[_] for _ in self._range(name, low, high))
+
+    def ending(self, within: float, now: Optional[float] = None) -> List[AuctionOrder]:
+        """
+        Auctions ending in the next `within` seconds after `now`, a UNIX
+
+        timestamp defaulting to the current time, soonest first.
+        """
+        if now is None:
+            now = time()
+        return list(self.range('end', int(now * 1000), int((now + within) * 1000)))
+
+    def cheapest(self, item_name: str, bin: bool = True) -> Optional[AuctionOrder]:
+        """
+        The cheapest auction for `item_name`, among open BIN auctions if
+
+        `bin`, in which case it is read from `ladder` in constant time.
+        """
+        if bin:
+            return self.ladder.lowest(item_name)
+        return min(self.lookup('item_name', item_name), key=auctionPrice, default=None)
+
+    def query(self, **conditions: Any) -> List[AuctionOrder]:
+        """
+        Auctions matching all of `conditions`. Hashed fields are matched
+
+        against a value, and sorted fields against a `(low, high)` range as
+
+        in `range()`. The most selective index is used to find candidates,
+
+        which are then checked against the remaining conditions. Results of
+
+        a sorted index come in increasing order.
+        """
+        unknown = set(conditions) - set(self.hashed) - set(self.ordered)
+        if unknown:
+            raise ValueError("Unsupported attribute " + repr(unknown))
+        sizes = {}
+        for name, value in conditions.items():
+            if name in self._hashes:
+                sizes[name] = len(self._hashes[name].get(value, ()))
+            else:
+                begin, end = self._bounds(name, *value)
+                sizes[name] = end - begin
+        if not sizes:
+            return list(self.snapshot.values())
+        best = min(sizes, key=sizes.get)
+        value = conditions.pop(best)
+        if best in self._hashes:
+            keys = self._hashes[best].get(value, ())
+        else:
+            keys = self._range(best, *value)
+        ret = []
+        for _ in keys:
+            o = self.snapshot[_]
+            for name, value in conditions.items():
+                current = self.value(o, name)
+                if name in self._hashes:
+                    if current != value:
+                        break
+                elif (value[0] is not None and current < value[0]) or \
+                        (value[1] is not None and current >= value[1]):
+                    break
+            else:
+                ret.append(o)
+        return ret
+
+__all__ = ['AuctionStore', 'PriceLadder', 'auctionPrice']
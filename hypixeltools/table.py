@@ -0,0 +1,220 @@
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+import numpy as np
+
+from .auction import AuctionOrder, _fetchPages, _parsePageRange
+from .network import skyblock_auctions
+
+
+class AuctionTable():
+    """
+    Columnar snapshot of the auction house. Numeric fields are stored in
+
+    NumPy arrays, and categorical fields as integer codes into a list of
+
+    categories, so filters and aggregations run as vectorized operations
+
+    over the whole snapshot.
+
+    Filtering works with boolean masks:
+
+    ```python
+    table = loadAuctionTable(key)
+    mask = table.eq('tier', 'LEGENDARY') & (table['starting_bid'] < 10 ** 6)
+    cheap = table[mask]
+    cheap.aggregate('item_name', 'price', 'min')
+    ```
+    """
+
+    numeric = ('start', 'end', 'starting_bid', 'highest_bid_amount')
+    flags = ('bin', 'claimed')
+    categorical = ('tier', 'category', 'item_name')
+
+    def __init__(
+        self, columns: Dict[str, np.ndarray], categories: Dict[str, List[str]],
+        uuid: np.ndarray):
+        self.columns = columns
+        self.categories = categories
+        self.uuid = uuid
+        self.failed: Dict[int, BaseException] = {}
+        self._codes: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def fromAuctions(cls, auctions: Iterable[Union[AuctionOrder, Dict]]) -> "AuctionTable":
+        """
+        Build a table from `AuctionOrder` objects or auction `dict` objects
+
+        as returned by the API.
+        """
+        numeric = {_: [] for _ in cls.numeric + cls.flags}
+        codes = {_: [] for _ in cls.categorical}
+        lookup: Dict[str, Dict[str, int]] = {_: {} for _ in cls.categorical}
+        uuid = []
+        for auction in auctions:
+            get = auction.get if isinstance(auction, dict) \
+                else lambda attr, default, o=auction: getattr(o, attr, default)
+            uuid.append(get('uuid', None))
+            for _, values in numeric.items():
+                values.append(get(_, 0))
+            for _, values in codes.items():
+                value = get(_, '')
+                values.append(lookup[_].setdefault(value, len(lookup[_])))
+        columns = {
+            _: np.array(numeric[_], dtype=np.int64) for _ in cls.numeric
+        }
+        columns.update({
+            _: np.array(numeric[_], dtype=np.bool_) for _ in cls.flags
+        })
+        columns.update({
+            _: np.array(codes[_], dtype=np.int32) for _ in cls.categorical
+        })
+        return cls(
+            columns, {_: list(lookup[_]) for _ in cls.categorical},
+            np.array(uuid, dtype=object)
+        )
+
+    @classmethod
+    def fromPages(cls, pages: Iterable[Dict]) -> "AuctionTable":
+        """
+        Build a table directly from `skyblock_auctions` responses.
+        """
+        return cls.fromAuctions(_ for page in pages for _ in page['auctions'])
+
+    def __len__(self) -> int:
+        return len(self.uuid)
+
+    def __repr__(self) -> str:
+        return "<AuctionTable of %d auctions>" % (len(self),)
+
+    def __getitem__(self, index: Union[str, np.ndarray, slice]) -> Union[np.ndarray, "AuctionTable"]:
+        """
+        `table[name]` returns a column, categorical ones as codes.
+
+        `table[mask]` or `table[indices]` returns the selected rows as a new
+
+        table sharing the categories of this one.
+        """
+        if isinstance(index, str):
+            return self.column(index)
+        return type(self)(
+            {_: column[index] for _, column in self.columns.items()},
+            self.categories, self.uuid[index]
+        )
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Returns column `name`. `price` is the highest bid, or the starting bid
+
+        of auctions without bids.
+        """
+        if name == 'price':
+            bid = self.columns['highest_bid_amount']
+            return np.where(bid > 0, bid, self.columns['starting_bid'])
+        if name not in self.columns:
+            raise KeyError("Unsupported column %s" % (name,))
+        return self.columns[name]
+
+    def code(self, name: str, value: str) -> int:
+        """
+        Returns the code of category `value` of column `name`, -1 if absent.
+        """
+        if name not in self._codes:
+            self._codes[name] = {
+                _: i for i, _ in enumerate(self.categories[name])
+            }
+        return self._codes[name].get(value, -1)
+
+    def decode(self, name: str) -> np.ndarray:
+        """
+        Returns categorical column `name` as an array of strings.
+        """
+        return np.array(self.categories[name], dtype=object)[self.columns[name]]
+
+    def eq(self, name: str, value: Any) -> np.ndarray:
+        if name in self.categorical:
+            return self.columns[name] == self.code(name, value)
+        return self.column(name) == value
+
+    def isin(self, name: str, values: Iterable) -> np.ndarray:
+        if name in self.categorical:
+            values = [self.code(name, _) for _ in values]
+        return np.isin(self.column(name), list(values))
+
+    def between(self, name: str, low: Any = None, high: Any = None) -> np.ndarray:
+        """
+        Mask of the rows with `low <= table[name] < high`.
+        """
+        column = self.column(name)
+        mask = np.ones(len(column), dtype=np.bool_)
+        if low is not None:
+            mask &= column >= low
+        if high is not None:
+            mask &= column < high
+        return mask
+
+    def aggregate(self, by: str, column: str, func: str = 'min') -> Dict[str, Any]:
+        """
+        Aggregate `column` grouped by categorical column `by`.
+
+        `func` is one of `count`, `sum`, `mean`, `min`, `max` and `median`.
+
+        Categories without rows are left out.
+        """
+        if not len(self):
+            return {}
+        groups = self.columns[by]
+        size = len(self.categories[by])
+        counts = np.bincount(groups, minlength=size)
+        if func == 'count':
+            result = counts
+        else:
+            values = self.column(column).astype(np.float64)
+            if func == 'sum' or func == 'mean':
+                result = np.bincount(groups, weights=values, minlength=size)
+                if func == 'mean':
+                    result = result / np.maximum(counts, 1)
+            elif func == 'min' or func == 'max':
+                result = np.full(size, np.inf if func == 'min' else -np.inf)
+                (np.minimum if func == 'min' else np.maximum).at(result, groups, values)
+            elif func == 'median':
+                ordered = values[np.lexsort((values, groups))]
+                starts = np.cumsum(counts) - counts
+                last = len(ordered) - 1
+                result = (
+                    ordered[np.minimum(starts + (counts - 1) // 2, last)] +
+                    ordered[np.minimum(starts + counts // 2, last)]
+                ) / 2
+            else:
+                raise ValueError("Unsupported aggregation %s" % (func,))
+        return {
+            self.categories[by][i]: result[i].item()
+            for i in np.flatnonzero(counts)
+        }
+
+    def sort(self, column: str, descending: bool = False) -> "AuctionTable":
+        order = np.argsort(self.column(column), kind='stable')
+        return self[order[::-1] if descending else order]
+
+
+def loadAuctionTable(key: str, *pageRange: Tuple[int]) -> AuctionTable:
+    """
+    Load the active auctions into an `AuctionTable`, without creating
+
+    `AuctionOrder` objects. Parameters are the same as `loadAuctionPages()`.
+
+    Pages which could not be fetched are reported in the `failed` attribute
+
+    of the table.
+    """
+    start, end, step = _parsePageRange(pageRange)
+    firstPage = skyblock_auctions(key=key, page=start)
+    if end < 0 or end > firstPage['totalPages']:
+        end = firstPage['totalPages']
+    pages, failed = _fetchPages(key, range(start + step, end, step))
+    pages[start] = firstPage
+    ret = AuctionTable.fromPages(pages[_] for _ in sorted(pages))
+    ret.failed = failed
+    return ret
+
+
+__all__ = ['AuctionTable', 'loadAuctionTable']
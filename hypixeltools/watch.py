@@ -0,0 +1,430 @@
+from asyncio import Event, Queue, Semaphore, Task, TimeoutError, gather, wait_for
+from heapq import heappop, heappush
+from time import monotonic, time
+from typing import AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .auction import AuctionDiff, AuctionOrder, AuctionSnapshot, AuctionSweeper, loadAuctionAPI
+from .network import (RateLimiter, RefreshClock, async_skyblock_auction,
+                      async_skyblock_auctions_ended, get_client)
+
+LISTED = 'listed'
+BID_PLACED = 'bid_placed'
+SOLD = 'sold'
+EXPIRED = 'expired'
+CLAIMED = 'claimed'
+
+
+class AuctionEvent(NamedTuple):
+    """
+    Change of an auction detected by `AuctionWatcher`.
+
+    * `kind`: one of `listed`, `bid_placed`, `sold`, `expired` and `claimed`
+    * `auction`: the auction after the change; for `sold` events, the record
+
+      returned by `skyblock_auctions_ended`, with `buyer` and `price`, and for
+
+      `expired` events the last state seen
+    * `previous`: the auction before the change, if known
+    * `timestamp`: `lastUpdated` of the refresh the change was detected in
+    """
+    kind: str
+    auction: AuctionOrder
+    previous: Optional[AuctionOrder]
+    timestamp: int
+
+
+class AuctionWatcher():
+    """
+    Change-data capture over the whole auction house.
+
+    Each refresh sweeps `skyblock_auctions` with an `AuctionSweeper` and reads
+
+    `skyblock_auctions_ended`, then turns a single diff against the previous
+
+    snapshot into `AuctionEvent` objects, so consumers only handle deltas:
+
+    ```python
+    async for event in AuctionWatcher(key):
+        if event.kind == 'sold':
+            print(event.auction.price)
+    ```
+
+    Auctions leaving the listing are reported as `sold` when they appear in
+
+    the ended auctions, within `grace` further refreshes of the ended
+
+    auctions since the two endpoints refresh separately, and as `expired`
+
+    otherwise, never both. Ended auctions are deduplicated by `auction_id`.
+
+    The first refresh only records the current listing and ended auctions.
+
+    Refreshes follow `clock`, a `RefreshClock` learning the refresh of the
+
+    listing from its `lastUpdated` field and cache headers, so each sweep
+
+    starts just after the data changes.
+    """
+
+    def __init__(self, key: str, *, grace: int = 2, clock: Optional[RefreshClock] = None):
+        self.key = key
+        self.clock = clock if clock else RefreshClock()
+        self.grace = grace
+        self.sweeper = AuctionSweeper(key)
+        self.snapshot: Optional[AuctionSnapshot] = None
+        self.lastUpdated: Optional[int] = None
+        self.endedUpdated: Optional[int] = None
+        self._swept: Optional[Set[AuctionOrder]] = None
+        self._ended: Dict[int, int] = {}
+        self._removed: Dict[int, List] = {}
+
+    def __aiter__(self) -> AsyncIterator[AuctionEvent]:
+        return self.events()
+
+    async def events(self) -> AsyncIterator[AuctionEvent]:
+        """
+        Refresh forever, yielding the events of each refresh.
+        """
+        while True:
+            for _ in await self.refresh():
+                yield _
+            await self.clock.async_wait()
+
+    async def refresh(self) -> List[AuctionEvent]:
+        """
+        Fetch both endpoints once, returning the events since the last call.
+        """
+        auctions, ended = await gather(
+            self.sweeper.asyncSweep(), async_skyblock_auctions_ended(key=self.key)
+        )
+        self.clock.observe(self.sweeper.lastUpdated, get_client().fresh_until(
+            'skyblock/auctions', {'key': self.key, 'page': self.sweeper.pageRange[0]}
+        ))
+        timestamp = self.sweeper.lastUpdated or ended.get('lastUpdated', 0)
+        first = self.snapshot is None
+        current = self.snapshot
+        # the sweeper returns the same set while the listing is unchanged;
+        # `lastUpdated` cannot tell, as it is `None` after partial sweeps
+        if current is None or auctions is not self._swept:
+            current = AuctionSnapshot(auctions)
+        self._swept = auctions
+        events = []
+        if not first:
+            events = self.changes(current.diff(self.snapshot), timestamp)
+        self.snapshot = current
+        self.lastUpdated = self.sweeper.lastUpdated
+        if ended.get('lastUpdated', None) != self.endedUpdated:
+            self.endedUpdated = ended.get('lastUpdated', None)
+            sales = self.sales(ended.get('auctions', []), timestamp)
+            if not first:
+                # auctions ended before the first refresh were never seen
+                # listed: they are only recorded, so they are not reported later
+                events.extend(sales)
+            # grace counts refreshes of the ended auctions, not polls
+            events.extend(self.expire(timestamp))
+        return events
+
+    def changes(self, diff: AuctionDiff, timestamp: int) -> List[AuctionEvent]:
+        """
+        Events of the auctions listed, bid on or claimed in `diff`. Removed
+
+        auctions wait for a matching sale for `grace` refreshes.
+        """
+        events = [AuctionEvent(LISTED, _, None, timestamp) for _ in diff.added]
+        for old, new in diff.changed:
+            if getattr(new, 'highest_bid_amount', 0) != getattr(old, 'highest_bid_amount', 0) \
+                    or len(getattr(new, 'bids', ())) != len(getattr(old, 'bids', ())):
+                events.append(AuctionEvent(BID_PLACED, new, old, timestamp))
+            if getattr(new, 'claimed', False) and not getattr(old, 'claimed', False):
+                events.append(AuctionEvent(CLAIMED, new, old, timestamp))
+        for _ in diff.removed:
+            if _.key not in self._ended:
+                self._removed[_.key] = [_, self.grace]
+        return events
+
+    def sales(self, records: List[Dict], timestamp: int) -> List[AuctionEvent]:
+        """
+        `sold` events of the ended auctions not reported yet.
+        """
+        events = []
+        for _ in records:
+            sale = AuctionOrder(**_)
+            if sale.key is None or sale.key in self._ended:
+                continue
+            self._ended[sale.key] = getattr(sale, 'timestamp', None) or timestamp
+            previous = self._removed.pop(sale.key, [None])[0]
+            if previous is None and self.snapshot is not None:
+                previous = self.snapshot.get(sale.key, None)
+            events.append(AuctionEvent(SOLD, sale, previous, timestamp))
+        # ended auctions are only listed for about a minute
+        horizon = max(self._ended.values(), default=0) - 600000
+        self._ended = {k: v for k, v in self._ended.items() if v >= horizon}
+        return events
+
+    def expire(self, timestamp: int) -> List[AuctionEvent]:
+        """
+        `expired` events of the removed auctions whose grace ran out.
+        """
+        events = []
+        for key, entry in list(self._removed.items()):
+            entry[1] -= 1
+            if entry[1] < 0:
+                del self._removed[key]
+                # a sale listed late must not be reported as well
+                self._ended[key] = timestamp
+                events.append(AuctionEvent(EXPIRED, entry[0], None, timestamp))
+        return events
+
+
+class ProfileUpdate(NamedTuple):
+    """
+    Changes of the auctions of `profile` found by `ProfileScheduler`.
+    """
+    profile: str
+    diff: AuctionDiff
+    auctions: AuctionSnapshot
+
+
+class ProfileScheduler():
+    """
+    Watch the auctions of many profiles concurrently, within a share of the
+
+    rate limit of the key.
+
+    Every profile has its own next poll time. After each poll, the profile
+
+    is polled again within `minInterval` to `maxInterval` seconds: sooner the
+
+    more its auctions changed recently, and just after its next auction
+
+    ends. At most `concurrency` profiles are polled at once, and the polls
+
+    spend at most `share` of the per-minute limit of the client's
+
+    `RateLimiter`. When the budget is short and several profiles are due,
+
+    the one most likely to have changed is polled first, as ranked by
+
+    `urgency()`, so the most active profiles keep their cadence.
+
+    ```python
+    scheduler = ProfileScheduler(key, profiles)
+    async for profile, diff, auctions in scheduler:
+        ...
+    ```
+
+    Only polls which found changes are yielded, the first poll of each
+
+    profile included. Errors of the last poll of a profile are kept in
+
+    `errors`.
+    """
+
+    def __init__(
+        self, key: str, profiles: Iterable[str] = (), *, minInterval: float = 10,
+        maxInterval: float = 300, settle: float = 2, share: float = 0.8,
+        concurrency: int = 8, client=None):
+        self.key = key
+        self.minInterval = minInterval
+        self.maxInterval = maxInterval
+        self.settle = settle
+        self.concurrency = concurrency
+        self.client = client
+        limiter = (client if client else get_client()).limiter
+        self.budget = RateLimiter(
+            max(int((limiter.limit if limiter else 120) * share), 1),
+            limiter.period if limiter else 60, margin=0
+        )
+        self.snapshots: Dict[str, Optional[AuctionSnapshot]] = {}
+        self.activity: Dict[str, float] = {}
+        self.due: Dict[str, float] = {}
+        self.errors: Dict[str, BaseException] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._changed = Event()
+        for _ in profiles:
+            self.add(_)
+
+    def __len__(self) -> int:
+        return len(self.due)
+
+    def __aiter__(self) -> AsyncIterator[ProfileUpdate]:
+        return self.updates()
+
+    def add(self, profile: str, due: Optional[float] = None):
+        """
+        Start watching `profile`, polling it at monotonic time `due`, or now.
+        """
+        self.snapshots.setdefault(profile, None)
+        self.activity.setdefault(profile, 0)
+        self._schedule(profile, monotonic() if due is None else due)
+
+    def remove(self, profile: str):
+        """
+        Stop watching `profile`.
+        """
+        self.due.pop(profile, None)
+        self.snapshots.pop(profile, None)
+        self.activity.pop(profile, None)
+        self.errors.pop(profile, None)
+
+    def _schedule(self, profile: str, due: float):
+        self.due[profile] = due
+        heappush(self._heap, (due, profile))
+        self._changed.set()
+
+    def interval(self, profile: str) -> float:
+        """
+        Seconds until the next poll of `profile`, from its activity and the
+
+        end of its auctions.
+        """
+        ret = self.maxInterval / (1 + self.activity[profile])
+        ends = [
+            getattr(_, 'end', 0) / 1000 for _ in (self.snapshots[profile] or {}).values()
+            if not getattr(_, 'claimed', False)
+        ]
+        now = time()
+        upcoming = [_ for _ in ends if _ > now]
+        if upcoming:
+            ret = min(ret, min(upcoming) - now + self.settle)
+        return min(max(ret, self.minInterval), self.maxInterval)
+
+    async def poll(self, profile: str) -> Optional[ProfileUpdate]:
+        """
+        Fetch the auctions of `profile` once, updating its schedule.
+        """
+        try:
+            response = await async_skyblock_auction(
+                key=self.key, profile=profile, client=self.client
+            )
+        except Exception as e:
+            if profile in self.due:
+                self.errors[profile] = e
+                self._schedule(profile, monotonic() + self.maxInterval)
+            return None
+        if profile not in self.due:
+            return None
+        self.errors.pop(profile, None)
+        current = AuctionSnapshot(loadAuctionAPI(response['auctions']))
+        previous = self.snapshots[profile]
+        diff = current.diff(previous if previous is not None else AuctionSnapshot())
+        self.snapshots[profile] = current
+        if previous is not None:
+            changes = len(diff.added) + len(diff.removed) + len(diff.changed)
+            self.activity[profile] = (self.activity[profile] + changes) / 2
+        self._schedule(profile, monotonic() + self.interval(profile))
+        return ProfileUpdate(profile, diff, current) if diff else None
+
+    def urgency(self, profile: str, due: float, now: float) -> float:
+        """
+        Priority of `profile`, due at monotonic time `due`, among the profiles
+
+        due at `now`: how late it is, plus `minInterval`, in units of its
+
+        interval. Active profiles and those with an auction about to end have
+
+        short intervals, so they come first, while the others gain priority
+
+        as they wait and are not starved.
+        """
+        return (now - due + self.minInterval) / self.interval(profile)
+
+    async def _wait(self):
+        """
+        Wait until the earliest scheduled profile comes due.
+        """
+        while True:
+            while not self._heap:
+                self._changed.clear()
+                await self._changed.wait()
+            due, profile = self._heap[0]
+            if self.due.get(profile, None) != due:
+                heappop(self._heap)
+                continue
+            if due > monotonic():
+                self._changed.clear()
+                try:
+                    await wait_for(self._changed.wait(), due - monotonic())
+                except TimeoutError:
+                    pass
+                continue
+            return
+
+    def _pick(self) -> Optional[str]:
+        """
+        Take the most urgent of the profiles due now, `None` if there is none.
+        """
+        now = monotonic()
+        candidates: Dict[str, float] = {}
+        while self._heap and self._heap[0][0] <= now:
+            due, profile = heappop(self._heap)
+            if self.due.get(profile, None) == due:
+                candidates[profile] = due
+        if not candidates:
+            return None
+        ret = max(candidates, key=lambda _: self.urgency(_, candidates[_], now))
+        for profile, due in candidates.items():
+            if profile != ret:
+                heappush(self._heap, (due, profile))
+        # polled profiles are rescheduled by poll()
+        self.due[ret] = float('inf')
+        return ret
+
+    async def _dispatch(self, results: Queue):
+        slots = Semaphore(self.concurrency)
+        running = set()
+
+        async def run(profile: str):
+            try:
+                await results.put(await self.poll(profile))
+            finally:
+                # complete the reservation, or `pending` grows forever
+                self.budget.release({})
+                slots.release()
+
+        try:
+            while True:
+                await self._wait()
+                await slots.acquire()
+                await self.budget.async_acquire()
+                # chosen once a request can be sent, among all the profiles
+                # which came due while waiting for the budget
+                profile = self._pick()
+                if profile is None:
+                    # removed meanwhile
+                    self.budget.refund()
+                    slots.release()
+                    continue
+                task = Task(run(profile))
+                running.add(task)
+                task.add_done_callback(running.discard)
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def updates(self) -> AsyncIterator[ProfileUpdate]:
+        """
+        Poll the profiles forever, yielding the updates with changes.
+        """
+        results: Queue = Queue(self.concurrency)
+        dispatcher = Task(self._dispatch(results))
+        try:
+            while True:
+                update = await results.get()
+                if update is not None:
+                    yield update
+        finally:
+            dispatcher.cancel()
+
+
+def aiterAuctionEvents(key: str, **kwargs) -> AsyncIterator[AuctionEvent]:
+    """
+    Iterate over the events of the whole auction house. Keyword arguments
+
+    are passed to `AuctionWatcher`.
+    """
+    return AuctionWatcher(key, **kwargs).events()
+
+
+__all__ = ['AuctionEvent', 'AuctionWatcher', 'ProfileScheduler', 'ProfileUpdate', 'aiterAuctionEvents',
+           'LISTED', 'BID_PLACED', 'SOLD', 'EXPIRED', 'CLAIMED']
@@ -0,0 +1,64 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from hypixeltools import network
+from hypixeltools.auction import aiterAuctionPages
+
+
+class TwinClient(network.Client):
+    """
+    Serves 10 pages of one auction each. Page 7 and its hedge are held until
+
+    the hedge is sent, then both resolve in the same event-loop round.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.release = None
+        self.calls = []
+
+    def page(self, page):
+        return {
+            'success': True, 'page': page, 'totalPages': 10, 'lastUpdated': 1,
+            'auctions': [{'uuid': '%032x' % (page + 1,), 'item_name': 'Item'}]
+        }
+
+    async def async_call(self, name, params, *, limited=True, shared=True):
+        page = params['page']
+        self.calls.append((page, shared))
+        if self.release is None:
+            self.release = asyncio.Event()
+        if page == 7:
+            if not shared:
+                self.release.set()
+            await self.release.wait()
+        else:
+            await asyncio.sleep(0.001 * page)
+        return self.page(page)
+
+
+class HedgeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = network._client
+        self.client = TwinClient()
+        network.set_client(self.client)
+
+    def tearDown(self):
+        network.set_client(self.previous)
+
+    def test_twins_done_together(self):
+        async def collect():
+            return [page async for page, _ in aiterAuctionPages('key', hedge=0.5, window=10)]
+
+        pages = asyncio.run(collect())
+        self.assertIn((7, False), self.client.calls)
+        self.assertEqual(sorted(pages), list(range(10)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from hypixeltools.comm import BaseFilter
+
+
+class TripFilter(BaseFilter):
+
+    @staticmethod
+    def getAttributeList() -> frozenset:
+        return frozenset({'from', 'to', 'fare'})
+
+
+def trip(**kwargs):
+    return SimpleNamespace(**{'from': kwargs.pop('src')}, **kwargs)
+
+
+class CompileTest(unittest.TestCase):
+
+    def test_keyword_attribute(self):
+        flt = TripFilter(('from', lambda _: _ == 'hub'), (('to', 'fare'), lambda t, f: f < 10))
+        predicate = flt.compile()
+        for o in (trip(src='hub', to='island', fare=5), trip(src='hub', to='island', fare=50),
+                  trip(src='island', to='hub', fare=5)):
+            self.assertEqual(predicate(o), flt(o))
+
+
+class ApplyTest(unittest.TestCase):
+
+    def test_filter_reassigned(self):
+        trips = [trip(src='hub', to='island', fare=5)]
+        flt = TripFilter(('fare', lambda _: _ < 10))
+        self.assertEqual(len(flt.apply(trips)), 1)
+        flt.filter = (('fare', lambda _: _ > 10),)
+        self.assertFalse(flt(trips[0]))
+        self.assertEqual(flt.apply(trips), [])
+
+    def test_nested_filter_reassigned(self):
+        trips = [trip(src='hub', to='island', fare=5), trip(src='hub', to='island', fare=50)]
+        inner = TripFilter(('fare', lambda _: _ < 10))
+        outer = TripFilter(('from', lambda _: _ == 'hub'), (None, inner))
+        self.assertEqual(outer.apply(trips), trips[:1])
+        inner.filter = (('fare', lambda _: _ > 10),)
+        self.assertEqual(outer.apply(trips), [_ for _ in trips if outer(_)])
+        self.assertEqual(outer.apply(trips), trips[1:])
+
+    def test_mode_reassigned(self):
+        trips = [trip(src='hub', to='island', fare=5), trip(src='island', to='hub', fare=50)]
+        flt = TripFilter(('from', lambda _: _ == 'hub'), ('fare', lambda _: _ > 10))
+        self.assertEqual(flt.apply(trips), [])
+        flt.mode = 'or'
+        self.assertEqual(flt.apply(trips), trips)
+        with self.assertRaises(ValueError):
+            flt.mode = 'xor'
+
+    def test_plan_keeps_original(self):
+        trips = [trip(src='hub', to='island', fare=_) for _ in range(20)]
+        flt = TripFilter(('fare', lambda _: _ % 2), ('fare', lambda _: _ < 3))
+        self.assertEqual(flt.apply(trips, sample=10), flt.apply(trips))
+        self.assertEqual(len(flt.filter), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
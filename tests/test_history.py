@@ -0,0 +1,154 @@
+import gzip
+import json
+import sys
+import tempfile
+import unittest
+from base64 import standard_b64encode
+from pathlib import Path
+from random import Random
+from struct import pack
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from hypixeltools.history import QuantileSketch, SalesHistory
+
+HOUR = 3600 * 1000
+
+
+def itemBytes(id, count):
+    """
+    `item_bytes` payload of a stack of `count` items with SkyBlock ID `id`.
+    """
+    def named(tag, name, payload):
+        return bytes([tag]) + pack(">H", len(name)) + name.encode() + payload
+
+    extra = named(10, "ExtraAttributes", named(8, "id", pack(">H", len(id)) + id.encode()) + b"\0")
+    item = named(1, "Count", pack(">b", count)) + named(10, "tag", extra + b"\0") + b"\0"
+    root = named(10, "", named(9, "i", bytes([10]) + pack(">i", 1) + item) + b"\0")
+    return {'type': 0, 'data': standard_b64encode(gzip.compress(root)).decode()}
+
+
+def record(i, price, timestamp, item_name='Enchanted Diamond', **kwargs):
+    ret = {
+        'auction_id': '%032x' % (i,), 'seller': '%032x' % (1,), 'buyer': '%032x' % (2,),
+        'timestamp': timestamp, 'price': price, 'bin': True, 'item_name': item_name,
+    }
+    ret.update(kwargs)
+    return ret
+
+
+class SketchTest(unittest.TestCase):
+
+    def assertRanks(self, sketch, values, tolerance):
+        values = sorted(values)
+        for q in (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99):
+            value = values[int(q * len(values))]
+            exact = sum(_ <= value for _ in values) / len(values)
+            self.assertLess(abs(sketch.rank(value) - exact), tolerance)
+
+    def test_exact_while_small(self):
+        sketch = QuantileSketch(50, range(1, 41), seed=1)
+        self.assertEqual(sketch.median(), 20)
+        self.assertEqual(sketch.rank(10), 0.25)
+        self.assertEqual((sketch.quantile(0), sketch.quantile(1)), (1, 40))
+
+    def test_rank_error(self):
+        random = Random(1)
+        values = [random.lognormvariate(10, 2) for _ in range(50000)]
+        sketch = QuantileSketch(200, values, seed=2)
+        self.assertEqual(len(sketch), len(values))
+        # memory stays in O(k)
+        self.assertLess(sketch._size, 3 * 200)
+        self.assertRanks(sketch, values, 0.02)
+
+    def test_merge(self):
+        random = Random(3)
+        low = [random.uniform(0, 100) for _ in range(20000)]
+        high = [random.uniform(50, 200) for _ in range(30000)]
+        merged = QuantileSketch(200, low, seed=4).merge(QuantileSketch(200, high, seed=5))
+        self.assertEqual(len(merged), 50000)
+        self.assertEqual(merged.min, min(low))
+        self.assertEqual(merged.max, max(high))
+        self.assertLess(merged._size, 3 * 200)
+        self.assertRanks(merged, low + high, 0.02)
+
+    def test_merge_empty(self):
+        sketch = QuantileSketch(20, range(100), seed=6)
+        copy = sketch.copy()
+        sketch.merge(QuantileSketch(20))
+        self.assertEqual(sketch.median(), copy.median())
+        self.assertIsNone(QuantileSketch(20).median())
+        with self.assertRaises(ValueError):
+            sketch.quantile(2)
+
+
+class SalesTest(unittest.TestCase):
+
+    def test_overlapping_responses(self):
+        history = SalesHistory()
+        first = [record(i, 100 * i, HOUR + i) for i in range(1, 4)]
+        second = first[1:] + [record(4, 400, HOUR + 60000)]
+        self.assertEqual(len(history.extend(first)), 3)
+        self.assertEqual([_.auction_id for _ in history.extend(second)], ['%032x' % (4,)])
+        self.assertIsNone(history.add(first[0]))
+        self.assertEqual(len(history['Enchanted Diamond']), 4)
+
+    def test_dedupe_horizon(self):
+        history = SalesHistory(horizon=600)
+        history.extend([record(1, 100, HOUR)])
+        history.extend([record(2, 100, HOUR + 601000)])
+        # forgotten past the horizon, when the endpoint no longer lists it
+        self.assertNotIn('%032x' % (1,), history._seen)
+        self.assertIn('%032x' % (2,), history._seen)
+
+    def test_per_unit_price(self):
+        history = SalesHistory()
+        sale = history.add(record(1, 640, HOUR, item_bytes=itemBytes('ENCHANTED_DIAMOND', 64)))
+        self.assertEqual((sale.item, sale.count, sale.price), ('ENCHANTED_DIAMOND', 64, 10))
+        self.assertEqual(history.median('ENCHANTED_DIAMOND'), 10)
+        # without readable item data, the name and the whole price are used
+        sale = history.add(record(2, 640, HOUR, item_bytes='not base64'))
+        self.assertEqual((sale.item, sale.count, sale.price), ('Enchanted Diamond', 1, 640))
+
+    def test_unknown_item(self):
+        history = SalesHistory()
+        self.assertIsNone(history.add(record(1, 10, HOUR, item_name=None)))
+        self.assertEqual(history.unknown, 1)
+
+    def test_window_expiry(self):
+        history = SalesHistory(window=3 * 3600, buckets=3)
+        history.extend(record(i, 100, i * HOUR) for i in range(1, 4))
+        self.assertEqual(len(history.sketch('Enchanted Diamond')), 3)
+        history.extend([record(10, 1000, 5 * HOUR + 1)])
+        # the bucket of hour 1 left the window, all time keeps its sale
+        self.assertEqual(len(history.sketch('Enchanted Diamond')), 3)
+        self.assertEqual(len(history.sketch('Enchanted Diamond', rolling=False)), 4)
+        self.assertEqual([_[0] for _ in history['Enchanted Diamond'].buckets], [2 * HOUR, 3 * HOUR, 5 * HOUR])
+        self.assertEqual(history.median('Enchanted Diamond', rolling=False), 100)
+        self.assertEqual(history.quantile('Enchanted Diamond', 1), 1000)
+
+    def test_idle_item_expires(self):
+        history = SalesHistory(window=3600, buckets=4)
+        history.extend([record(1, 5, HOUR, item_name='Dirt')])
+        history.extend([record(2, 100, 3 * HOUR)])
+        self.assertEqual(len(history.sketch('Dirt')), 0)
+        self.assertEqual(history.percentiles('Dirt', rolling=False), {
+            10: 5, 25: 5, 50: 5, 75: 5, 90: 5
+        })
+
+    def test_jsonl_append(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = str(Path(directory) / 'sales.jsonl')
+            history = SalesHistory(path=path)
+            history.extend([record(1, 100, HOUR), record(2, 200, HOUR + 1)])
+            history.extend([record(2, 200, HOUR + 1)])
+            history.extend([record(3, 300, HOUR + 2)])
+            with open(path) as file:
+                lines = [json.loads(_) for _ in file]
+        self.assertEqual([_['price'] for _ in lines], [100, 200, 300])
+        self.assertEqual(lines[0]['auction_id'], '%032x' % (1,))
+        self.assertEqual(lines[0]['item'], 'Enchanted Diamond')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import gzip
+import sys
+import unittest
+from base64 import standard_b64encode
+from pathlib import Path
+from struct import pack
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from hypixeltools import nbt
+
+
+def string(raw):
+    return pack(">H", len(raw)) + raw
+
+
+def named(tag, name, payload):
+    return bytes([tag]) + string(name.encode()) + payload
+
+
+def compound(*children):
+    return b"".join(children) + b"\x00"
+
+
+def document(*children):
+    return named(10, "", compound(*children))
+
+
+def item(id, count=1, **extra):
+    attributes = [named(8, "id", string(id.encode()))]
+    attributes += [named(3, k, pack(">i", v)) for k, v in extra.items()]
+    return compound(
+        named(1, "Count", pack(">b", count)),
+        named(10, "tag", compound(
+            named(10, "display", compound(named(8, "Name", string(b"\xc2\xa76" + id.encode())))),
+            named(10, "ExtraAttributes", compound(*attributes)),
+        )),
+    )
+
+
+def payload(*items):
+    return standard_b64encode(gzip.compress(document(
+        named(9, "i", bytes([10]) + pack(">i", len(items)) + b"".join(items))
+    ))).decode()
+
+
+class LoadTest(unittest.TestCase):
+
+    def test_tags(self):
+        data = document(
+            named(1, "b", pack(">b", -1)),
+            named(2, "s", pack(">h", 300)),
+            named(4, "l", pack(">q", 2 ** 40)),
+            named(6, "d", pack(">d", 0.5)),
+            named(10, "c", compound(named(8, "name", string(b"x")))),
+            named(9, "ints", bytes([3]) + pack(">i", 3) + pack(">3i", 1, -2, 3)),
+            named(9, "strs", bytes([8]) + pack(">i", 2) + string(b"a") + string(b"b")),
+            named(9, "empty", bytes([0]) + pack(">i", 0)),
+            named(9, "none", bytes([3]) + pack(">i", 0)),
+            named(7, "bytes", pack(">i", 2) + b"\x01\x02"),
+            named(11, "iarr", pack(">i", 2) + pack(">2i", 5, 6)),
+            named(12, "larr", pack(">i", 1) + pack(">q", -7)),
+        )
+        self.assertEqual(nbt.loadNBT(data), {
+            'b': -1, 's': 300, 'l': 2 ** 40, 'd': 0.5, 'c': {'name': 'x'},
+            'ints': [1, -2, 3], 'strs': ['a', 'b'], 'empty': [], 'none': [],
+            'bytes': b"\x01\x02", 'iarr': [5, 6], 'larr': [-7],
+        })
+
+    def test_gzip_and_raw(self):
+        data = document(named(3, "n", pack(">i", 42)))
+        self.assertEqual(nbt.loadNBT(data), {'n': 42})
+        self.assertEqual(nbt.loadNBT(gzip.compress(data)), {'n': 42})
+
+    def test_modified_utf8(self):
+        # encoded NUL and a CESU-8 surrogate pair for U+1F600
+        raw = b"a\xc0\x80b\xed\xa0\xbd\xed\xb8\x80"
+        data = document(named(8, "s", string(raw)))
+        self.assertEqual(nbt.loadNBT(data), {'s': "a\x00b\U0001F600"})
+
+    def test_not_compound(self):
+        with self.assertRaises(ValueError):
+            nbt.loadNBT(named(3, "n", pack(">i", 1)))
+
+
+class ItemsTest(unittest.TestCase):
+
+    def setUp(self):
+        nbt._cache.clear()
+
+    def test_parse(self):
+        items = nbt.parseItems(payload(
+            item("HYPERION", upgrade_level=5, hot_potato_count=10, rarity_upgrades=1)
+        ))
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0].id, "HYPERION")
+        self.assertEqual(items[0].name, "\xa76HYPERION")
+        self.assertEqual(items[0].stars, 5)
+        self.assertEqual(items[0].hotPotatoCount, 10)
+        self.assertTrue(items[0].recombobulated)
+
+    def test_cache_hit(self):
+        data = payload(item("ASPECT_OF_THE_END", count=2))
+        first = nbt.decodeItems(data)
+        self.assertIs(nbt.decodeItems(data), first)
+        self.assertEqual(first[0].count, 2)
+        self.assertIn(nbt._digest(data), nbt._cache)
+
+    def test_bulk_uses_cache(self):
+        data = payload(item("TERMINATOR"))
+        cached = nbt.decodeItems(data)
+        ret = nbt.bulkDecodeItems([data, data])
+        self.assertIs(ret[0], cached)
+        self.assertIs(ret[1], cached)
+
+    def test_bulk_decodes_missing(self):
+        payloads = [payload(item("TERMINATOR")), payload(item("JUJU_SHORTBOW"))]
+        ret = nbt.bulkDecodeItems(payloads + payloads[:1], processes=1)
+        self.assertEqual([_[0].id for _ in ret], ["TERMINATOR", "JUJU_SHORTBOW", "TERMINATOR"])
+        self.assertIs(nbt.decodeItems(payloads[1]), ret[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
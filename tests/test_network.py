@@ -0,0 +1,305 @@
+import asyncio
+import sys
+import unittest
+from threading import Thread
+from time import monotonic, sleep, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from hypixeltools import network
+
+
+class SessionTest(unittest.TestCase):
+
+    def test_injected_session_untouched(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(max_retries=5)
+        session.mount("https://", adapter)
+        headers = dict(session.headers)
+        with network.Client(session=session) as client:
+            self.assertIs(client.session.get_adapter("https://x"), adapter)
+            self.assertEqual(dict(client.session.headers), headers)
+
+    def test_own_session_pooled(self):
+        with network.Client(pool_size=4) as client:
+            adapter = client.session.get_adapter("https://x")
+            self.assertEqual(adapter._pool_maxsize, 4)
+            self.assertEqual(client.session.headers["Connection"], "keep-alive")
+
+
+class FakeSession():
+    """
+    Answers with the `(status, headers, body)` responses it was given, in order.
+    """
+
+    def __init__(self, *responses, delay=0):
+        self.responses = list(responses)
+        self.delay = delay
+        self.sent = []
+
+    def get(self, url, params=None, **kwargs):
+        sleep(self.delay(url) if callable(self.delay) else self.delay)
+        status, headers, body = self.responses.pop(0)
+        self.sent.append(monotonic())
+        response = requests.Response()
+        response.status_code = status
+        response.headers.update(headers)
+        response._content = body
+        return response
+
+    def close(self):
+        pass
+
+
+class ThrottleTest(unittest.TestCase):
+
+    def test_retry_after_honoured(self):
+        session = FakeSession(
+            (429, {'Retry-After': '0.3'}, b'{"success": false, "cause": "limit"}'),
+            (200, {}, b'{"success": true}'),
+        )
+        with network.Client(session=session, limiter=network.RateLimiter(6000)) as client:
+            self.assertEqual(client.call('key', {'key': 'k'}), {'success': True})
+        self.assertGreaterEqual(session.sent[1] - session.sent[0], 0.3)
+
+    def test_retry_delay_fallbacks(self):
+        client = network.Client(backoff=0.5)
+        response = requests.Response()
+        response.headers['RateLimit-Reset'] = '7'
+        self.assertEqual(client.retry_after(response), 7)
+        self.assertEqual(client.retry_after(requests.Response(), 2), 2)
+        response.headers['Retry-After'] = 'Thu, 01 Jan 1970 00:00:00 GMT'
+        self.assertEqual(client.retry_after(response), 0)
+        client.close()
+
+    def test_pause_delays_others(self):
+        limiter = network.RateLimiter(6000)
+        self.assertEqual(limiter.reserve(), 0)
+        limiter.pause(5)
+        self.assertGreater(limiter.reserve(), 5)
+
+
+class CoalesceTest(unittest.TestCase):
+
+    def test_blocking_call_on_loop_thread(self):
+        session = FakeSession(*[(200, {}, b'{"success": true}')] * 2, delay=0.1)
+        client = network.Client(session=session, limiter=network.RateLimiter(6000))
+        results = []
+
+        async def main():
+            pending = asyncio.ensure_future(
+                network.endpoint('async_player')(key='k', uuid=1, client=client)
+            )
+            await asyncio.sleep(0)
+            results.append(network.endpoint('player')(key='k', uuid=1, client=client))
+            results.append(await pending)
+
+        thread = Thread(target=asyncio.run, args=(main(),), daemon=True)
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(results, [{'success': True}] * 2)
+        self.assertEqual(len(session.sent), 2)
+        client.close()
+
+    def test_closed_generator_leaves_nothing_in_flight(self):
+        session = FakeSession(
+            *[(200, {}, b'{"success": true}')] * 8,
+            delay=lambda url: 0.01 if 'uuid=a' in url else 0.2
+        )
+        client = network.Client(session=session, limiter=network.RateLimiter(6000))
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            responses = network.fetch_many('player', ['a', 'b', 'c', 'd'], key='k', client=client)
+            next(responses)
+            responses.close()
+            self.assertEqual(client.inflight, {})
+            results = []
+            thread = Thread(
+                target=lambda: results.append(client.call('player', {'uuid': 'c', 'key': 'k'})),
+                daemon=True
+            )
+            thread.start()
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+            self.assertEqual(results, [{'success': True}])
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+            client.close()
+
+    def test_stopped_loop_not_joined(self):
+        session = FakeSession(*[(200, {}, b'{"success": true}')] * 2, delay=0.1)
+        client = network.Client(session=session, limiter=network.RateLimiter(6000))
+        loop = asyncio.new_event_loop()
+        try:
+            # started, then left pending on a loop which no longer runs
+            task = loop.create_task(client.async_call('player', {'uuid': 1}))
+            loop.run_until_complete(asyncio.sleep(0))
+            self.assertIn(network.ResponseCache.make_key('player', {'uuid': 1}), client.inflight)
+            results = []
+            thread = Thread(
+                target=lambda: results.append(client.call('player', {'uuid': 1})), daemon=True
+            )
+            thread.start()
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+            self.assertEqual(results, [{'success': True}])
+            self.assertEqual(loop.run_until_complete(task), {'success': True})
+        finally:
+            loop.close()
+            client.close()
+
+    def test_cancel_one_waiter(self):
+        session = FakeSession((200, {}, b'{"success": true}'), delay=0.1)
+        client = network.Client(session=session, limiter=network.RateLimiter(6000))
+
+        async def main():
+            first = asyncio.ensure_future(client.async_call('player', {'uuid': 1}))
+            second = asyncio.ensure_future(client.async_call('player', {'uuid': 1}))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(main()), {'success': True})
+        self.assertEqual(len(session.sent), 1)
+        client.close()
+
+    def test_shared_across_threads(self):
+        session = FakeSession((200, {}, b'{"success": true}'), delay=0.2)
+        client = network.Client(session=session, limiter=network.RateLimiter(6000))
+
+        async def main():
+            pending = asyncio.ensure_future(client.async_call('player', {'uuid': 1}))
+            await asyncio.sleep(0.05)
+            other = await asyncio.get_running_loop().run_in_executor(
+                None, client.call, 'player', {'uuid': 1}
+            )
+            return other, await pending
+
+        self.assertEqual(asyncio.run(main()), ({'success': True},) * 2)
+        self.assertEqual(len(session.sent), 1)
+        client.close()
+
+
+def response(body=b'{}', **headers):
+    ret = requests.Response()
+    ret.status_code = 200
+    ret.headers.update(headers)
+    ret._content = body
+    return ret
+
+
+class CacheTest(unittest.TestCase):
+
+    def test_expiry(self):
+        cache = network.ResponseCache(refresh=60)
+        now = time()
+        self.assertAlmostEqual(cache.expiry(response(**{'Cache-Control': 'max-age=30'}), {}), now + 30, 0)
+        self.assertEqual(cache.expiry(response(**{'Cache-Control': 'no-cache'}), {}), 0)
+        updated = {'lastUpdated': int(now * 1000)}
+        self.assertAlmostEqual(cache.expiry(response(), updated, 'skyblock/auctions'), now + 60, 0)
+        self.assertEqual(cache.expiry(response(), {}, 'player'), 0)
+
+    def test_ttl_fallback(self):
+        cache = network.ResponseCache(ttl=10)
+        now = time()
+        # edited long ago: the TTL of resources applies
+        edited = {'lastUpdated': 1570754198669}
+        self.assertAlmostEqual(
+            cache.expiry(response(), edited, 'resources/skyblock/skills'), now + 3600, 0
+        )
+        self.assertAlmostEqual(cache.expiry(response(), {}, 'gamecounts'), now + 60, 0)
+        self.assertAlmostEqual(cache.expiry(response(), {}, 'player'), now + 10, 0)
+        key = cache.make_key('leaderboards', {'key': 'k'})
+        cache.put(key, response(), {'success': True})
+        self.assertEqual(cache.get(key), {'success': True})
+
+    def test_lru_eviction(self):
+        cache = network.ResponseCache(max_bytes=10, ttl=60)
+        keys = [cache.make_key('player', {'uuid': i}) for i in range(3)]
+        cache.put(keys[0], response(b'0123'), {'n': 0})
+        cache.put(keys[1], response(b'0123'), {'n': 1})
+        self.assertIsNotNone(cache.get(keys[0]))
+        cache.put(keys[2], response(b'0123'), {'n': 2})
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertEqual(cache.get(keys[0]), {'n': 0})
+        self.assertEqual(cache.size, 8)
+
+    def test_byte_cap(self):
+        cache = network.ResponseCache(max_bytes=10, ttl=60)
+        key = cache.make_key('player', {'uuid': 1})
+        cache.put(key, response(b'x' * 11), {'n': 1})
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(cache.size, 0)
+
+
+def simulate(refresh, guess, duration=3600, offset=7.3):
+    """
+    Polls an endpoint refreshing every `refresh` seconds for `duration`
+
+    seconds, following a clock guessing `guess`. Returns the clock and the
+
+    number of polls.
+    """
+    clock = network.RefreshClock(guess)
+    now = begin = 1e9
+    polls = 0
+    while now < begin + duration:
+        now = max(clock.next_poll(now), now + 0.001)
+        updated = (now - offset) // refresh * refresh + offset
+        clock.observe(int(updated * 1000), None, now)
+        polls += 1
+    return clock, polls
+
+
+class ClockTest(unittest.TestCase):
+
+    def assertLearns(self, refresh, guess):
+        clock, polls = simulate(refresh, guess)
+        self.assertAlmostEqual(clock.period, refresh, 1)
+        # one poll per refresh, plus probes and the first refresh
+        self.assertLess(polls, 3600 / refresh * 1.1 + 20)
+        self.assertLessEqual(clock.staleness[-1], clock.delay)
+
+    def test_guess_too_short(self):
+        self.assertLearns(60, 30)
+
+    def test_guess_not_divisor(self):
+        self.assertLearns(90, 60)
+
+    def test_guess_too_long(self):
+        self.assertLearns(20, 60)
+
+    def test_guess_right(self):
+        self.assertLearns(60, 60)
+
+    def test_skipped_refreshes_collapsed(self):
+        clock = network.RefreshClock(60)
+        for updated in (0, 60, 180, 240, 480):
+            clock.observe(int((1e9 + updated) * 1000), None, 1e9 + updated + 1)
+        self.assertEqual(clock.period, 60)
+
+    def test_fresh_until(self):
+        clock = network.RefreshClock(60)
+        for refresh in range(5):
+            now = 1e9 + refresh * 45 + 1
+            self.assertTrue(clock.observe(None, 1e9 + (refresh + 1) * 45, now))
+            self.assertFalse(clock.observe(None, 1e9 + (refresh + 1) * 45, now + 1))
+        self.assertEqual(clock.period, 45)
+        self.assertEqual(clock.next_poll(1e9 + 201), 1e9 + 225 + clock.delay)
+
+    def test_lagging_replica(self):
+        clock = network.RefreshClock(60)
+        self.assertTrue(clock.observe(1000060000, None, 1e6 + 61))
+        self.assertFalse(clock.observe(1000000000, None, 1e6 + 62))
+        self.assertEqual(clock.updated, 1000060)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,209 @@
+import asyncio
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from hypixeltools.pipeline import Channel, callProcessor, runStages
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 5))
+
+
+class ChannelTest(unittest.TestCase):
+
+    def test_block(self):
+        channel = Channel(2)
+        backlog = []
+
+        async def produce():
+            for i in range(6):
+                await channel.put(i)
+                backlog.append(len(channel))
+            await channel.close()
+
+        async def consume():
+            ret = []
+            async for item in channel:
+                await asyncio.sleep(0.001)
+                ret.append(item)
+            return ret
+
+        async def main():
+            return (await asyncio.gather(produce(), consume()))[1]
+
+        self.assertEqual(run(main()), list(range(6)))
+        self.assertLessEqual(max(backlog), 2)
+        self.assertEqual((channel.dropped, channel.coalesced), (0, 0))
+
+    def test_block_waits_for_room(self):
+        channel = Channel(1)
+
+        async def main():
+            await channel.put(1)
+            blocked = asyncio.ensure_future(channel.put(2))
+            await asyncio.sleep(0.01)
+            self.assertFalse(blocked.done())
+            self.assertEqual(await channel.get(), 1)
+            self.assertTrue(await blocked)
+            return list(channel.items)
+
+        self.assertEqual(run(main()), [2])
+
+    def test_drop(self):
+        channel = Channel(2, 'drop')
+
+        async def main():
+            return [await channel.put(_) for _ in range(5)]
+
+        self.assertEqual(run(main()), [True, True, False, False, False])
+        # the newest items are the ones discarded
+        self.assertEqual(list(channel.items), [0, 1])
+        self.assertEqual(channel.dropped, 3)
+
+    def test_coalesce(self):
+        channel = Channel(2, 'coalesce')
+
+        async def main():
+            for _ in range(5):
+                await channel.put(_)
+
+        run(main())
+        # the newest waiting item is replaced, the oldest is kept
+        self.assertEqual(list(channel.items), [0, 4])
+        self.assertEqual(channel.coalesced, 3)
+
+    def test_coalesce_merge(self):
+        channel = Channel(1, 'coalesce', merge=lambda old, new: old + [new])
+
+        async def main():
+            await channel.put([0])
+            for _ in range(1, 4):
+                await channel.put(_)
+            return await channel.get()
+
+        self.assertEqual(run(main()), [0, 1, 2, 3])
+        self.assertEqual(channel.coalesced, 3)
+
+    def test_close_then_drain(self):
+        channel = Channel(3)
+
+        async def main():
+            await channel.put(1)
+            await channel.put(2)
+            await channel.close()
+            with self.assertRaises(ValueError):
+                await channel.put(3)
+            ret = [_ async for _ in channel]
+            with self.assertRaises(StopAsyncIteration):
+                await channel.get()
+            return ret
+
+        self.assertEqual(run(main()), [1, 2])
+
+    def test_close_wakes_consumer(self):
+        channel = Channel()
+
+        async def main():
+            waiting = asyncio.ensure_future(channel.get())
+            await asyncio.sleep(0.01)
+            await channel.close()
+            with self.assertRaises(StopAsyncIteration):
+                await waiting
+
+        run(main())
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            Channel(1, 'latest')
+        with self.assertRaises(ValueError):
+            Channel(0)
+
+
+class StagesTest(unittest.TestCase):
+
+    def test_error_cancels_others(self):
+        cancelled = []
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise KeyError('stage')
+
+        async def forever():
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def main():
+            with self.assertRaises(KeyError):
+                await runStages(fail(), forever())
+            await asyncio.sleep(0)
+
+        run(main())
+        self.assertEqual(cancelled, [True])
+
+    def test_cancelled(self):
+        cancelled = []
+
+        async def stage():
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def main():
+            task = asyncio.ensure_future(runStages(stage(), stage()))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            await asyncio.sleep(0)
+
+        run(main())
+        self.assertEqual(cancelled, [True, True])
+
+    def test_results(self):
+        channel = Channel(1)
+        received = []
+
+        async def produce():
+            for _ in range(3):
+                await channel.put(_)
+            await channel.close()
+
+        async def consume():
+            async for _ in channel:
+                received.append(_)
+
+        run(runStages(produce(), consume()))
+        self.assertEqual(received, [0, 1, 2])
+
+
+class ProcessorTest(unittest.TestCase):
+
+    def test_call(self):
+        async def asynchronous(a, b):
+            return a + b
+
+        def synchronous(a, b):
+            return threading.current_thread(), a * b
+
+        async def main():
+            loop = threading.current_thread()
+            self.assertEqual(await callProcessor(asynchronous, 2, 3), 5)
+            self.assertEqual(await callProcessor(synchronous, 2, 3), (loop, 6))
+            thread, ret = await callProcessor(synchronous, 2, 3, offload=True)
+            self.assertIsNot(thread, loop)
+            self.assertEqual(ret, 6)
+
+        run(main())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from hypixeltools.auction import AuctionOrder
+from hypixeltools.snapshot import openSnapshot, writeSnapshot
+
+ACTIVE = {
+    'uuid': '%032x' % (1,), 'auctioneer': '%032x' % (2,), 'profile_id': '%032x' % (3,),
+    'coop': ['%032x' % (2,)], 'start': 1600000000000, 'end': 1600086400000,
+    'item_name': 'Hyperion', 'item_lore': '§6Ability: Wither Impact', 'extra': 'Hyperion Diamond Sword',
+    'category': 'weapon', 'tier': 'LEGENDARY', 'starting_bid': 800000000,
+    'item_bytes': 'H4sIAAAAAAAAAA==', 'claimed': False, 'claimed_bidders': [],
+    'highest_bid_amount': 0, 'bin': True, 'bids': [],
+}
+ENDED = {
+    'auction_id': '%032x' % (4,), 'seller': '%032x' % (5,), 'seller_profile': '%032x' % (6,),
+    'buyer': '%032x' % (7,), 'timestamp': 1600000000000, 'bin': True,
+    'price': 1.5e9, 'item_bytes': {'type': 0, 'data': 'H4sIAAAAAAAAAA=='},
+}
+
+
+class RoundTripTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.directory.name) / 'ah.snap')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def roundTrip(self, auctions, lastUpdated=None):
+        self.assertEqual(writeSnapshot(self.path, auctions, lastUpdated), len(auctions))
+        with openSnapshot(self.path) as snapshot:
+            self.assertEqual(snapshot.lastUpdated, lastUpdated)
+            return [_.toDict() for _ in snapshot]
+
+    def test_active(self):
+        bids = dict(ACTIVE, uuid='%032x' % (8,), bin=False, highest_bid_amount=10, bids=[
+            {'bidder': '%032x' % (9,), 'amount': 10, 'timestamp': 1600000001000}
+        ])
+        expected = [AuctionOrder(**ACTIVE).toDict(), AuctionOrder(**bids).toDict()]
+        self.assertEqual(self.roundTrip([ACTIVE, AuctionOrder(**bids)], 1600000000000), expected)
+
+    def test_ended(self):
+        # float price and dict item_bytes do not fit the columns
+        loaded, = self.roundTrip([ENDED])
+        self.assertEqual(loaded, ENDED)
+        self.assertIsInstance(loaded['price'], float)
+        self.assertNotIn('uuid', loaded)
+
+    def test_non_canonical_keys(self):
+        dashed = dict(ACTIVE, uuid='00000000-0000-0000-0000-00000000000A')
+        upper = dict(ENDED, auction_id='%032X' % (0xab,))
+        loaded = self.roundTrip([dashed, upper])
+        self.assertEqual(loaded[0]['uuid'], dashed['uuid'])
+        self.assertEqual(loaded[1]['auction_id'], upper['auction_id'])
+
+    def test_absent_fields(self):
+        sparse = {'uuid': '%032x' % (10,), 'item_name': 'Dirt', 'highest_bid_amount': None}
+        loaded, = self.roundTrip([sparse])
+        # `bin` defaults to False on `AuctionOrder`
+        self.assertEqual(loaded, dict(sparse, bin=False))
+        self.assertNotIn('tier', loaded)
+
+    def test_index(self):
+        writeSnapshot(self.path, [ACTIVE, ENDED])
+        with openSnapshot(self.path) as snapshot:
+            self.assertEqual(len(snapshot), 2)
+            self.assertEqual(snapshot[-1].toDict(), ENDED)
+            with self.assertRaises(IndexError):
+                snapshot[2]
+
+    def test_to_snapshot(self):
+        writeSnapshot(self.path, [ACTIVE, ENDED])
+        with openSnapshot(self.path) as snapshot:
+            auctions = snapshot.toSnapshot()
+        self.assertEqual(set(auctions), {1, 4})
+        self.assertEqual(auctions[4].price, ENDED['price'])
+        self.assertEqual(auctions[1].item_lore, 'Ability: Wither Impact')
+
+    def test_to_table(self):
+        other = dict(ACTIVE, uuid='%032x' % (11,), tier='EPIC', starting_bid=5)
+        writeSnapshot(self.path, [ACTIVE, other, ENDED])
+        with openSnapshot(self.path) as snapshot:
+            table = snapshot.toTable()
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table['starting_bid'].tolist(), [800000000, 5, 0])
+        self.assertEqual(table.eq('tier', 'EPIC').tolist(), [False, True, False])
+        self.assertEqual(table.uuid.tolist(), [ACTIVE['uuid'], other['uuid'], None])
+
+    def test_not_snapshot(self):
+        Path(self.path).write_bytes(b'\0' * 64)
+        with self.assertRaises(ValueError):
+            openSnapshot(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
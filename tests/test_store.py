@@ -0,0 +1,86 @@
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from hypixeltools.auction import AuctionOrder
+from hypixeltools import store as stores
+from hypixeltools.store import AuctionStore, PriceLadder
+
+
+def auction(i, price, **kwargs):
+    fields = dict(
+        uuid='%032x' % (i,), item_name='Hyperion', starting_bid=price, bin=True,
+        claimed=False, bids=[]
+    )
+    fields.update(kwargs)
+    return AuctionOrder(**fields)
+
+
+class LadderTest(unittest.TestCase):
+
+    def test_bought_bin_leaves_ladder(self):
+        store = AuctionStore()
+        store.sync([auction(1, 100), auction(2, 200)])
+        self.assertEqual(store.cheapest('Hyperion').key, 1)
+        # bought but not claimed yet
+        bought = auction(1, 100, highest_bid_amount=100, bids=[{'amount': 100}])
+        store.sync([bought, auction(2, 200)])
+        self.assertEqual(store.cheapest('Hyperion').key, 2)
+        self.assertEqual(store.ladder.levels('Hyperion', 3), [(200, 1)])
+
+
+class BulkTest(unittest.TestCase):
+
+    def auctions(self, count, offset=0):
+        return [
+            auction(
+                i + offset, (i * 7919) % 1000, item_name='Item%d' % (i % 7),
+                end=(i * 104729) % 5000, bin=i % 3 != 0, tier='EPIC' if i % 2 else 'RARE'
+            ) for i in range(1, count + 1)
+        ]
+
+    def incremental(self, auctions):
+        store = AuctionStore()
+        for _ in auctions:
+            store.add(_)
+        return store
+
+    def assertSame(self, store, expected):
+        self.assertEqual(store._ranges, expected._ranges)
+        self.assertEqual(store._hashes, expected._hashes)
+        self.assertEqual(store.ladder._ladders, expected.ladder._ladders)
+        self.assertEqual(set(store.ladder._entries), set(expected.ladder._entries))
+
+    def test_first_sync_bulk(self):
+        auctions = self.auctions(2 * stores.bulk)
+        store = AuctionStore()
+        store.sync(auctions)
+        self.assertSame(store, self.incremental(auctions))
+        self.assertSame(AuctionStore(auctions), self.incremental(auctions))
+        self.assertEqual(
+            [_.end for _ in store.range('end', 100, 200)],
+            sorted(_.end for _ in auctions if 100 <= _.end < 200)
+        )
+
+    def test_extend_replaces(self):
+        auctions = self.auctions(stores.bulk)
+        store = AuctionStore(auctions)
+        # half replaced with new end times and prices, half new
+        more = self.auctions(stores.bulk, stores.bulk // 2)
+        store.extend(more)
+        self.assertSame(store, self.incremental(auctions + more))
+
+    def test_ladder_extend(self):
+        auctions = self.auctions(50)
+        ladder = PriceLadder(auctions[:10])
+        ladder.extend(auctions)
+        expected = PriceLadder()
+        for _ in auctions:
+            expected.add(_)
+        self.assertEqual(ladder._ladders, expected._ladders)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from hypixeltools import network, watch
+from hypixeltools.auction import AuctionOrder, AuctionSnapshot
+
+
+def auction(i):
+    return AuctionOrder(uuid='%032x' % (i,), item_name='Item', starting_bid=i, bin=True)
+
+
+class FakeSweeper():
+    """
+    Stands in for `AuctionSweeper`, returning the same set while unchanged.
+    """
+
+    def __init__(self):
+        self.pageRange = (0, -1, 1)
+        self.lastUpdated = None
+        self.auctions = set()
+
+    def list(self, keys, lastUpdated):
+        self.auctions = {auction(_) for _ in keys}
+        self.lastUpdated = lastUpdated
+
+    async def asyncSweep(self):
+        return self.auctions
+
+
+class WatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ended = {'lastUpdated': 1000, 'auctions': []}
+        self.original = watch.async_skyblock_auctions_ended
+
+        async def ended(**kwargs):
+            return self.ended
+
+        watch.async_skyblock_auctions_ended = ended
+        self.watcher = watch.AuctionWatcher('key', grace=2)
+        self.sweeper = self.watcher.sweeper = FakeSweeper()
+
+    def tearDown(self):
+        watch.async_skyblock_auctions_ended = self.original
+
+    def refresh(self):
+        return [(_.kind, _.auction.key) for _ in asyncio.run(self.watcher.refresh())]
+
+    def end(self, lastUpdated, *keys):
+        self.ended = {'lastUpdated': lastUpdated, 'auctions': [
+            {'auction_id': '%032x' % (_,), 'price': _, 'bin': True} for _ in keys
+        ]}
+
+    def test_removed_then_sold_late(self):
+        self.sweeper.list((1, 2, 3), 60000)
+        self.assertEqual(self.refresh(), [])
+        self.sweeper.list((1, 2), 120000)
+        # polls retried while the ended auctions are not refreshed keep the grace
+        for _ in range(5):
+            self.assertEqual(self.refresh(), [])
+        self.end(2000, 3)
+        self.assertEqual(self.refresh(), [('sold', 3)])
+        self.end(3000)
+        self.assertEqual(self.refresh(), [])
+
+    def test_expired_then_sold_later(self):
+        self.sweeper.list((1, 2, 3), 60000)
+        self.refresh()
+        self.sweeper.list((1, 2), 120000)
+        events = []
+        for i in range(3):
+            self.end(2000 + i)
+            events += self.refresh()
+        self.assertEqual(events, [('expired', 3)])
+        self.end(9000, 3)
+        self.assertEqual(self.refresh(), [])
+
+    def test_first_refresh_records_sales(self):
+        self.end(1000, 7, 8, 9)
+        self.sweeper.list((1, 2, 3), 60000)
+        self.assertEqual(self.refresh(), [])
+        # still listed in the ended auctions after the next refresh
+        self.end(2000, 7, 8, 9, 3)
+        self.sweeper.list((1, 2), 120000)
+        self.assertEqual(self.refresh(), [('sold', 3)])
+
+    def test_partial_sweeps(self):
+        self.sweeper.list((1, 2), None)
+        self.refresh()
+        self.sweeper.list((1, 2, 4), None)
+        self.assertEqual(self.refresh(), [('listed', 4)])
+
+
+class SchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.polls = []
+        self.original = watch.async_skyblock_auction
+        self.client = network.Client(limiter=network.RateLimiter(6000))
+
+        async def auction(*, key, profile, client=None):
+            self.polls.append(profile)
+            if profile != 'active':
+                return {'success': True, 'auctions': []}
+            # four new auctions on every poll, replacing the previous ones
+            return {'success': True, 'auctions': [
+                {'uuid': '%032x' % (len(self.polls) * 4 + _,), 'item_name': 'Item', 'end': 0}
+                for _ in range(4)
+            ]}
+
+        watch.async_skyblock_auction = auction
+
+    def tearDown(self):
+        watch.async_skyblock_auction = self.original
+        self.client.close()
+
+    def scheduler(self, **kwargs):
+        ret = watch.ProfileScheduler('key', client=self.client, **kwargs)
+        # 20 polls per second, none in advance
+        ret.budget = network.RateLimiter(20, 1, margin=0)
+        ret.budget.tokens = 0
+        return ret
+
+    def watch(self, scheduler, seconds):
+        async def consume():
+            updates = []
+
+            async def collect():
+                async for _ in scheduler:
+                    updates.append(_)
+
+            task = asyncio.ensure_future(collect())
+            await asyncio.sleep(seconds)
+            task.cancel()
+            return updates
+
+        return asyncio.run(consume())
+
+    def test_active_not_starved(self):
+        scheduler = self.scheduler(minInterval=0.05, maxInterval=1, concurrency=4)
+        scheduler.add('active', watch.monotonic() + 0.1)
+        scheduler.snapshots['active'] = AuctionSnapshot()
+        scheduler.activity['active'] = 8
+        for i in range(100):
+            scheduler.add('idle%d' % (i,))
+        self.watch(scheduler, 1.5)
+        # close to its own cadence of 0.11 s, out of 20 polls per second,
+        # while polled in the order the profiles came due it got none
+        self.assertGreaterEqual(self.polls.count('active'), 6)
+        self.assertLessEqual(len(self.polls), 32)
+
+    def test_urgency(self):
+        scheduler = self.scheduler(minInterval=1, maxInterval=100)
+        scheduler.add('idle')
+        scheduler.add('active')
+        scheduler.snapshots['active'] = AuctionSnapshot()
+        scheduler.activity['active'] = 9
+        # an idle profile overdue long enough outranks an active one
+        self.assertGreater(scheduler.urgency('active', 0, 0), scheduler.urgency('idle', 0, 0))
+        self.assertGreater(scheduler.urgency('idle', 0, 20), scheduler.urgency('active', 20, 20))
+
+    def test_interval_follows_end(self):
+        scheduler = self.scheduler(minInterval=1, maxInterval=100, settle=2)
+        scheduler.add('profile')
+        ending = AuctionOrder(uuid='%032x' % (1,), end=int((watch.time() + 10) * 1000))
+        scheduler.snapshots['profile'] = AuctionSnapshot([ending])
+        self.assertAlmostEqual(scheduler.interval('profile'), 12, 0)
+
+    def test_updates_only_changes(self):
+        scheduler = self.scheduler(minInterval=0.05, maxInterval=0.1)
+        scheduler.add('active')
+        scheduler.add('idle')
+        updates = self.watch(scheduler, 0.5)
+        self.assertIn('idle', self.polls)
+        # an empty profile never changes
+        self.assertNotIn('idle', [_.profile for _ in updates])
+        self.assertGreater([_.profile for _ in updates].count('active'), 1)
+        self.assertEqual(len(scheduler), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()